@@ -0,0 +1,107 @@
+import pandas as pd
+
+from schema import CGPA, NAME, ROLL_NUMBER, SECTION, TOTAL_BACKLOGS
+
+SUCCESS = 'Success'
+LEETCODE_STATUS = 'LeetCode_Status'
+HACKERRANK_STATUS = 'HackerRank_Status'
+SOLVED = 'LeetCode_Total_Solved'
+HARD_SOLVED = 'LeetCode_Hard_Solved'
+BADGES = 'HackerRank_Total_Badges'
+STARS = 'HackerRank_Total_Stars'
+
+# Admission year taken from the first two digits of the roll number
+COHORT = 'Cohort'
+GROUP_COLUMNS = (SECTION, COHORT)
+
+# Columns correlated with CGPA and ranked within each section and cohort
+ACTIVITY_COLUMNS = [SOLVED, HARD_SOLVED, BADGES, STARS]
+RANKED_COLUMNS = [SOLVED, STARS]
+GROUP_PERCENTILES = (0.25, 0.5, 0.75, 0.9)
+
+_COHORT_PATTERN = r'^\s*(\d{2})'
+
+
+def cohort_labels(roll_numbers):
+    """Admission year ('2023') for each roll number, or NA when it does not start with one"""
+    years = roll_numbers.astype('string').str.extract(_COHORT_PATTERN, expand=False)
+    return '20' + years
+
+
+class CohortAnalytics:
+    """
+    Summary figures, percentiles, leaderboards and CGPA correlations for one
+    enriched frame
+    df must carry the typed columns normalize_students and enrich_students
+    produce. Everything is computed up front in whole-column passes, so an
+    instance can be cached per finished bulk run and rendered on every rerun
+    for free. Students whose lookups failed have no counts and are left out of
+    the percentiles, rankings and correlations rather than counted as zero.
+    """
+
+    def __init__(self, df):
+        frame = pd.DataFrame({
+            ROLL_NUMBER: df[ROLL_NUMBER],
+            SECTION: df[SECTION] if SECTION in df.columns else pd.NA,
+            COHORT: cohort_labels(df[ROLL_NUMBER]),
+            CGPA: df[CGPA],
+            TOTAL_BACKLOGS: df[TOTAL_BACKLOGS],
+        })
+        self.names = NAME in df.columns
+        if self.names:
+            frame[NAME] = df[NAME]
+        # Quantiles, ranks and correlations want plain floats with NaN
+        for col in ACTIVITY_COLUMNS:
+            frame[col] = df[col].astype('float64')
+        self.groups = [col for col in GROUP_COLUMNS if frame[col].notna().any()]
+
+        for group in self.groups:
+            for col in RANKED_COLUMNS:
+                frame[f'{col}_{group}_Percentile'] = frame.groupby(group)[col].rank(pct=True) * 100
+        self.frame = frame
+
+        hackerrank_ok = df[HACKERRANK_STATUS].eq(SUCCESS)
+        self.summary = {
+            'students': len(df),
+            'leetcode_success': int(df[LEETCODE_STATUS].eq(SUCCESS).sum()),
+            'hackerrank_success': int(hackerrank_ok.sum()),
+            'average_cgpa': frame[CGPA].mean(),
+            'with_backlogs': int(frame[TOTAL_BACKLOGS].gt(0).sum()),
+            # Averages over every student, as students without badges have none
+            'average_badges': frame[BADGES].fillna(0).mean(),
+            'average_stars': frame[STARS].fillna(0).mean(),
+            'max_badges': frame[BADGES].max(),
+        }
+        self.percentiles = {group: self._group_percentiles(group) for group in self.groups}
+        self.leaderboards = {col: self._leaderboard(col) for col in RANKED_COLUMNS}
+        self.correlation = self._correlation()
+
+    def _group_percentiles(self, group):
+        grouped = self.frame.groupby(group)
+        quantiles = grouped[RANKED_COLUMNS].quantile(list(GROUP_PERCENTILES)).unstack()
+        quantiles.columns = [f'{col} p{round(q * 100)}' for col, q in quantiles.columns]
+        table = pd.concat([grouped.size().rename('Students'), grouped[CGPA].mean().rename('Mean CGPA'), quantiles],
+                          axis=1)
+        return table.reset_index()
+
+    def _leaderboard(self, col):
+        ranked = self.frame[self.frame[col].notna()].sort_values([col, CGPA], ascending=False, kind='stable')
+        board = ranked[[ROLL_NUMBER, *([NAME] if self.names else []), *self.groups, col, CGPA]].copy()
+        board.insert(0, 'Rank', ranked[col].rank(method='min', ascending=False).astype('int64'))
+        for group in self.groups:
+            board[f'{group} percentile'] = ranked[f'{col}_{group}_Percentile']
+        return board.reset_index(drop=True)
+
+    def _correlation(self):
+        columns = [CGPA, *ACTIVITY_COLUMNS]
+        values = self.frame[columns]
+        paired = values[ACTIVITY_COLUMNS].notna() & values[[CGPA]].notna().to_numpy()
+        return pd.DataFrame({
+            'Students': paired.sum(),
+            'Pearson': values.corr(method='pearson')[CGPA].drop(CGPA),
+            'Spearman': values.corr(method='spearman')[CGPA].drop(CGPA),
+        }).rename_axis('Compared with CGPA').reset_index()
+
+    def top(self, col, n):
+        """The n best students by col, ties sharing a rank"""
+        return self.leaderboards[col].head(n)
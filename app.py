@@ -1,226 +1,390 @@
 import streamlit as st
-import pandas as pd
-import requests
-from datetime import datetime
+from datetime import datetime, timedelta
 import json
 from io import BytesIO
-import base64
-import time
-import re
-from bs4 import BeautifulSoup
+
+from checkpoint import FRESHNESS_SECONDS, get_journal, uploads_hash
+from limiter import MAX_LIMIT, describe_states
+from metrics import histogram_quantile, summary_rows, to_json, to_prometheus
+from mime import CSV_MIME, XLSX_MIME
+
+# pandas, requests, lxml, pyarrow and xlsxwriter are imported further down,
+# by the part of the page or the function that needs them, so the upload page
+# draws without waiting for them. Each function imports what it uses itself.
 
 # Set page config as the very first Streamlit command
 st.set_page_config(page_title="Student Performance Dashboard", layout="wide")
 
-def fetch_hackerrank_badges_svg(username):
-    """
-    Fetch HackerRank badges by parsing SVG structure directly
-    Returns list of dictionaries with badge names and star counts
-    """
-    # Predefined list of valid HackerRank badges
-    VALID_HACKERRANK_BADGES = {
-        'Problem Solving', 'Java', 'Python', 'C Language', 'Cpp', 'C#', 'JavaScript',
-        'Sql', '30 Days of Code', '10 Days of JavaScript', '10 Days of Statistics',
-        'Algorithms', 'Data Structures', 'Regex', 'Artificial Intelligence',
-        'Databases', 'Shell', 'Linux Shell', 'Functional Programming',
-        'Mathematics', 'Days of ML', 'Rust', 'Kotlin', 'Swift', 'Scala',
-        'Ruby', 'Go', 'Statistics', 'Interview Preparation Kit',
-        'Object Oriented Programming', 'Linux Shell', 'Security'
-    }
-    try:
-        badge_url = f'https://hackerrank-badges.vercel.app/{username}'
-        response = requests.get(badge_url, timeout=15)
-        if response.status_code == 200:
-            svg_xml = response.text
-            soup = BeautifulSoup(svg_xml, 'xml')
-            
-            # Look for badge information in the SVG
-            text_elements = soup.find_all('text')
-            
-            # Look for star sections - this is the key structure
-            star_sections = soup.find_all('g', class_='star-section')
-            
-            # Look for individual badge stars
-            badge_stars = soup.find_all('svg', class_='badge-star')
-            
-            # Display all text content to understand the structure
-            all_texts = []
-            for text in text_elements:
-                text_content = text.get_text().strip()
-                if text_content and len(text_content) > 1:
-                    all_texts.append(text_content)
-            
-            # Analyze star sections
-            for i, star_section in enumerate(star_sections):
-                stars_in_section = star_section.find_all('svg', class_='badge-star')
-            
-            # Try to identify actual badges by looking for meaningful patterns
-            badge_keywords = ['java', 'python', 'sql', 'javascript', 'cpp', 'problem solving', 
-                            'algorithms', 'data structures', '30 days', '10 days', 'ruby', 
-                            'swift', 'golang', 'rust', 'kotlin', 'scala', 'c', 'shell',
-                            'functional programming', 'object oriented programming']
-            
-            real_badges = []
-            
-            # Strategy: Match badges with their corresponding star sections
-            # The structure seems to be: badge text + associated star-section
-            for text in all_texts:
-                text_lower = text.lower()
-                for keyword in badge_keywords:
-                    if keyword in text_lower:
-                        # ✅ Check if badge is in VALID_HACKERRANK_BADGES
-                        text_title = text.strip().title()
-                        if text_title not in VALID_HACKERRANK_BADGES:
-                            continue  # Skip if not a valid badge name
+# LeetCode and HackerRank profiles each session keeps fetched results for, oldest dropped first
+SESSION_PROFILES = 32
+
+# Load student data
+@st.cache_resource(max_entries=8)
+def load_student_data(file_hash, _files):
+    # Merged and normalized once per set of uploads and shared read-only
+    # across reruns and sessions; _files holds (name, bytes) per upload
+    from schema import StudentTable, read_students
+
+    sources = []
+    for name, data in _files:
+        source = BytesIO(data)
+        source.name = name
+        sources.append(source)
+    return StudentTable(read_students(*sources))
+
+@st.cache_resource(max_entries=8)
+def load_cohort_analytics(job_id, _job):
+    # A finished job's results never change, so its export is read back and
+    # aggregated once
+    from analytics import CohortAnalytics
+
+    return CohortAnalytics(_job.result_frame())
+
+@st.fragment(run_every=1)
+def show_job_progress(job_id):
+    # Polls the background job without rerunning the whole page
+    from http_client import get_client
+    from jobs import RUNNING, get_job_runner
+
+    job = get_job_runner().get(job_id)
+    if job.finished:
+        st.rerun()
+    st.progress(job.done / job.total if job.total else 0.0)
+    if job.status == RUNNING:
+        st.text(f"Processed student {job.done}/{job.total}: {job.current}")
+        st.caption(f"Adaptive concurrency: {describe_states(get_client().limiter_states())}")
+    else:
+        st.text("Fetching data for all students... This may take a while...")
+
+def session_profile(site, username, force_refresh):
+    # Fetched results and parsed badges are kept in the session keyed by
+    # username, so reruns reuse them; lookups that raised are started again
+    from enrichment import LEETCODE_SERVICE
+    from prefetch import get_prefetcher
+
+    if not username:
+        return None
+    profiles = st.session_state.setdefault('profiles', {})
+    key = (site, username, force_refresh)
+    prefetched = profiles.pop(key, None)
+    if prefetched is None or prefetched.failed():
+        if site == LEETCODE_SERVICE:
+            prefetched = get_prefetcher().prefetch(leetcode_username=username, force_refresh=force_refresh)
+        else:
+            prefetched = get_prefetcher().prefetch(hackerrank_username=username, force_refresh=force_refresh)
+    profiles[key] = prefetched
+    while len(profiles) > SESSION_PROFILES:
+        profiles.pop(next(iter(profiles)))
+    return prefetched
+
+@st.fragment
+def show_leetcode_panel(data, prefetched):
+    # Reruns on its own; prefetched holds this session's results for the student
+    import pandas as pd
+    import requests
+
+    from schema import LEETCODE_USERNAME, LINK_PROBLEMS
+
+    st.markdown("### 🧠 LeetCode Statistics")
+    
+    if data[LEETCODE_USERNAME] is not None:
+        with st.spinner("Fetching LeetCode data..."):
+            try:
+                # Extract username from URL
+                username = data[LEETCODE_USERNAME]
+                
+                if username:
+                    # LeetCode Stats API
+                    stats = prefetched.leetcode_stats.result()
+                    
+                    if stats is not None:
+                        # Display basic stats
+                        col1, col2, col3, col4 = st.columns(4)
+                        with col1:
+                            st.metric("✅ Total Solved", stats.get('totalSolved', 0))
+                        with col2:
+                            st.metric("⭐ Easy Problems", stats.get('easySolved', 0))
+                        with col3:
+                            st.metric("🟠 Medium Problems", stats.get('mediumSolved', 0))
+                        with col4:
+                            st.metric("🔴 Hard Problems", stats.get('hardSolved', 0))
                         
-                        # Find the text element in the soup
-                        text_elem = None
-                        for elem in text_elements:
-                            if elem.get_text().strip().lower() == text_lower:
-                                text_elem = elem
-                                break
+                        # Additional stats if available
+                        if 'acceptanceRate' in stats:
+                            st.metric("📈 Acceptance Rate", f"{stats['acceptanceRate']:.1f}%")
+                        if 'ranking' in stats:
+                            st.metric("🏆 Ranking", stats['ranking'])
+                    
+                    # Try to fetch submission timeline (Alternative API)
+                    st.markdown("#### 📅 Recent Activity Timeline")
+                    try:
+                        # GraphQL query for LeetCode submissions
+                        submissions = prefetched.submissions.result()
                         
-                        stars = 0
-                        if text_elem:
-                            # Strategy 1: Look for star-section in the same parent or nearby elements
-                            # Traverse up the DOM tree to find associated star sections
-                            current = text_elem
-                            found_stars = False
-                            
-                            # Check multiple levels up the DOM tree
-                            for level in range(5):  # Check up to 5 levels up
-                                if current is None:
-                                    break
-                                    
-                                # Look for star-section in current element
-                                star_section = current.find('g', class_='star-section')
-                                if star_section:
-                                    badge_star_elements = star_section.find_all('svg', class_='badge-star')
-                                    stars = len(badge_star_elements)
-                                    found_stars = True
-                                    break
-                                
-                                # Look for star-section in siblings
-                                if current.parent:
-                                    sibling_star_sections = current.parent.find_all('g', class_='star-section')
-                                    if sibling_star_sections:
-                                        # Take the first star section found (assuming it's related)
-                                        badge_star_elements = sibling_star_sections[0].find_all('svg', class_='badge-star')
-                                        stars = len(badge_star_elements)
-                                        found_stars = True
-                                        break
+                        if submissions is not None:
+                            if submissions:
+                                # Create DataFrame for submissions
+                                df_submissions = pd.DataFrame(submissions[:10])  # Show last 10 submissions
+                                df_submissions['timestamp'] = pd.to_datetime(pd.to_numeric(df_submissions['timestamp']), unit='s')
+                                df_submissions['date'] = df_submissions['timestamp'].dt.strftime('%Y-%m-%d %H:%M')
                                 
-                                current = current.parent
-                            
-                            # Strategy 2: If no direct association found, try positional matching
-                            if not found_stars and star_sections:
-                                # Get text position
-                                text_x = text_elem.get('x', '0')
-                                text_y = text_elem.get('y', '0')
+                                st.dataframe(
+                                    df_submissions[['title', 'statusDisplay', 'lang', 'date']], 
+                                    use_container_width=True
+                                )
+                            else:
+                                st.info("No recent submissions found or profile is private.")
+                        else:
+                            st.warning("Could not fetch submission timeline. Profile might be private.")
+                    
+                    except Exception as e:
+                        st.warning(f"Timeline fetch failed: Could not retrieve submission history")
+                    
+                else:
+                    st.error(f"Could not extract username from LeetCode URL ({data[LINK_PROBLEMS]})")
+            
+            except requests.exceptions.RequestException:
+                st.error("Failed to fetch LeetCode stats. Please check the URL or try again later.")
+            except Exception as e:
+                st.error(f"An error occurred: {str(e)}")
+    else:
+        st.warning("No valid LeetCode URL found for this student.")
+
+@st.fragment
+def show_hackerrank_panel(data, prefetched):
+    # The manual badge form and error details rerun only this panel
+    import pandas as pd
+    import requests
+
+    from schema import HACKERRANK_USERNAME
+
+    st.markdown("### 🎖️ HackerRank Statistics")
+    
+    if data[HACKERRANK_USERNAME]:
+        with st.spinner("Fetching HackerRank data..."):
+            try:
+                # Extract username from URL
+                username = data[HACKERRANK_USERNAME]
+                
+                # Display the badge image first, from the SVG that is parsed below
+                svg_xml = prefetched.hackerrank_svg.result()
+                if svg_xml:
+                    st.image(svg_xml, caption=f"HackerRank Badges for {username}", use_container_width=True)
+                
+                # Use the new SVG parsing function
+                st.markdown("#### 🏆 Badge Details")
+                
+                badges = prefetched.hackerrank_badges()
+                
+                if badges:
+                    st.success(f"✅ Successfully extracted {len(badges)} badges!")
+                    
+                    # Create DataFrame for better display
+                    badges_df = pd.DataFrame(badges)
+                    
+                    # Display badges in a nice format
+                    st.dataframe(badges_df, use_container_width=True)
+                    
+                    # Show summary statistics
+                    total_badges = len(badges)
+                    total_stars = sum(badge['Stars'] for badge in badges if isinstance(badge['Stars'], int))
+                    avg_stars = total_stars / total_badges if total_badges > 0 else 0
+                    
+                    # Display summary metrics
+                    col1, col2, col3 = st.columns(3)
+                    with col1:
+                        st.metric("🎖️ Total Badges", total_badges)
+                    with col2:
+                        st.metric("⭐ Total Stars", total_stars)
+                    
+                    # Show badges grouped by star count
+                    st.markdown("#### ⭐ Badges by Star Rating")
+                    star_groups = {}
+                    for badge in badges:
+                        stars = badge['Stars']
+                        if isinstance(stars, int):
+                            if stars not in star_groups:
+                                star_groups[stars] = []
+                            star_groups[stars].append(badge['Badge Name'])
+                    
+                    for stars in sorted(star_groups.keys(), reverse=True):
+                        badge_names = ", ".join(star_groups[stars])
+                        star_emoji = "⭐" * stars if stars > 0 else "⚪"
+                        st.write(f"{star_emoji} **{stars} Star{'s' if stars != 1 else ''}:** {badge_names}")
+                    
+                    # Export badges data
+                    st.markdown("#### 📥 Export Badge Data")
+                    badges_json = json.dumps(badges, indent=2)
+                    st.download_button(
+                        label="Download Badge Data as JSON",
+                        data=badges_json,
+                        file_name=f"hackerrank_badges_{username}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
+                        mime="application/json"
+                    )
+                    
+                else:
+                    st.warning("⚠️ Could not extract badge information from the SVG.")
+                    
+                    # Provide manual entry option
+                    st.markdown("### ✏️ Manual Badge Entry")
+                    st.info("Since automatic extraction failed, you can manually enter badge information by looking at the image above.")
+                    
+                    with st.form(f"manual_badges_{username}"):
+                        st.markdown("**Enter badge information manually:**")
+                        
+                        num_badges = st.number_input("How many badges do you see?", min_value=0, max_value=20, value=0)
+                        
+                        manual_badges = []
+                        if num_badges > 0:
+                            for i in range(num_badges):
+                                col1, col2 = st.columns(2)
+                                with col1:
+                                    badge_name = st.text_input(f"Badge {i+1} Name:", key=f"name_{i}")
+                                with col2:
+                                    badge_stars = st.number_input(f"Badge {i+1} Stars:", min_value=0, max_value=5, value=0, key=f"stars_{i}")
                                 
-                                try:
-                                    text_x_num = float(text_x) if str(text_x).replace('.', '').replace('-', '').isdigit() else 0
-                                    text_y_num = float(text_y) if str(text_y).replace('.', '').replace('-', '').isdigit() else 0
-                                    
-                                    closest_star_section = None
-                                    min_distance = float('inf')
-                                    
-                                    for star_section in star_sections:
-                                        # Get star section position from transform attribute
-                                        transform = star_section.get('transform', '')
-                                        if 'translate' in transform:
-                                            # Extract translate values
-                                            translate_match = re.search(r'translate\(([^,]+),\s*([^)]+)\)', transform)
-                                            if translate_match:
-                                                try:
-                                                    star_x = float(translate_match.group(1))
-                                                    star_y = float(translate_match.group(2))
-                                                    
-                                                    distance = ((star_x - text_x_num) ** 2 + (star_y - text_y_num) ** 2) ** 0.5
-                                                    if distance < min_distance:
-                                                        min_distance = distance
-                                                        closest_star_section = star_section
-                                                except:
-                                                    continue
-                                    
-                                    if closest_star_section:
-                                        badge_star_elements = closest_star_section.find_all('svg', class_='badge-star')
-                                        stars = len(badge_star_elements)
-                                        found_stars = True
-                                        
-                                except:
-                                    pass
+                                if badge_name:
+                                    manual_badges.append({"Badge Name": badge_name, "Stars": badge_stars})
+                        
+                        submitted = st.form_submit_button("💾 Save Manual Badges")
+                        
+                        if submitted and manual_badges:
+                            st.success(f"✅ Manually entered {len(manual_badges)} badges!")
+                            manual_df = pd.DataFrame(manual_badges)
+                            st.dataframe(manual_df, use_container_width=True)
                             
-                            # Strategy 3: Simple distribution if we have star sections
-                            if not found_stars and star_sections:
-                                st.write("  📊 Using simple distribution strategy...")
-                                # Count total stars and distribute among badges
-                                total_star_elements = soup.find_all('svg', class_='badge-star')
-                                total_badges = len([t for t in all_texts if any(kw in t.lower() for kw in badge_keywords)])
-                                if total_badges > 0:
-                                    stars = len(total_star_elements) // total_badges
-                                    st.write(f"  ⭐ Estimated {stars} stars ({len(total_star_elements)} total / {total_badges} badges)")
+                            # Show summary for manual badges
+                            total_manual_stars = sum(badge['Stars'] for badge in manual_badges)
+                            st.metric("Total Manual Stars", total_manual_stars)
+                    
+                    # Show troubleshooting tips
+                    with st.expander("🔧 Troubleshooting Tips"):
+                        st.markdown("""
+                        **Common issues and solutions:**
                         
-                        real_badges.append({
-                            'Badge Name': text.title(),
-                            'Stars': stars
-                        })
+                        1. **Profile is Private**: Make sure the HackerRank profile is public
+                        2. **Username Issue**: Check if the username extracted from URL is correct
+                        3. **No Badges**: User might not have earned any badges yet
+                        4. **Server Issue**: The badge service might be temporarily down
+                        5. **SVG Structure Changed**: The badge generator might have updated its format
                         
-                        break  # Found this badge, don't check other keywords
-            
-            # Remove duplicates
-            seen = set()
-            unique_badges = []
-            for badge in real_badges:
-                badge_key = badge['Badge Name'].lower()
-                if badge_key not in seen:
-                    seen.add(badge_key)
-                    unique_badges.append(badge)
-            
-            return unique_badges if unique_badges else None
-            
-        else:
-            st.write(f"HTTP Error: {response.status_code}")
-            return None
-            
-    except Exception as e:
-        st.write(f"Exception occurred: {str(e)}")
-        return None
+                        **What you can do:**
+                        - Enable debug mode above to see the raw SVG structure
+                        - Try accessing the URL directly: `https://hackerrank-badges.vercel.app/{username}`
+                        - Use manual entry if automatic parsing fails
+                        """)
+                
+            except requests.exceptions.RequestException:
+                st.error("Failed to fetch HackerRank data. Please check the URL or try again later.")
+            except Exception as e:
+                st.error(f"An error occurred: {str(e)}")
+                
+                # Show error details in debug mode
+                if st.checkbox("Show error details", key=f"error_debug_{username}"):
+                    st.code(str(e))
+    else:
+        st.warning("No valid HackerRank URL found for this student.")
 
-# Load student data
-@st.cache_data
-def load_student_data(uploaded_file):
-    df = pd.read_csv(uploaded_file)
-    # Clean column names
-    df.columns = df.columns.str.strip()
-    return df
+@st.fragment
+def show_summary_panel(data):
+    import pandas as pd
+
+    from analytics import SOLVED, STARS
+    from history import TAKEN_AT, get_history
+
+    st.markdown("### 📊 Performance Summary")
+    
+    # Performance metrics
+    #cgpa_status = "Excellent" if data['CGPA'] >= 9.0 else "Good" if data['CGPA'] >= 8.0 else "Average" if data['CGPA'] >= 7.0 else "Below Average"
+    #backlog_status = "No Backlogs" if data['Total Backlogs'] == 0 else f"{data['Total Backlogs']} Backlog(s)"
+   
+    #col1, col2 = st.columns(2)
+    #with col1:
+     #   st.info(f"**CGPA Status:** {cgpa_status}")
+      #  st.info(f"**Backlog Status:** {backlog_status}") 
+
+    st.info(f"**HackerRank Profile:** {'✅ Available' if pd.notna(data['Hackerrank profile']) else '❌ Not Available'}")
+    st.info(f"**LeetCode Profile:** {'✅ Available' if pd.notna(data['LeetCode profile']) else '❌ Not Available'}")
+    
+    # Counts recorded by earlier bulk runs; read locally, no network calls
+    st.markdown("#### 📈 Progress Over Time")
+    snapshots = get_history().student_history(data['Roll Number'])
+    if len(snapshots) > 1:
+        st.line_chart(snapshots.set_index(TAKEN_AT)[[SOLVED, STARS]])
+    else:
+        st.info("Progress appears here once this student has been included in two or more bulk runs.")
 
 st.title("📊 Student Performance Dashboard")
 st.header("📁 Upload Student Data")
 
 # File uploader
-uploaded_file = st.file_uploader(
-    "Choose a CSV file", 
-    type="csv",
-    help="Upload a CSV file containing student data with required columns"
+uploaded_files = st.file_uploader(
+    "Choose CSV or Excel files", 
+    type=["csv", "xlsx"],
+    accept_multiple_files=True,
+    help="Upload one or more files containing student data with required columns. "
+         "Students listed in several files are looked up once, using their latest submission."
 )
 
 # Check if file is uploaded before proceeding
-if uploaded_file is not None:
-    df = load_student_data(uploaded_file)
+if uploaded_files:
+    import pandas as pd
+
+    from schema import HACKERRANK_USERNAME, LEETCODE_USERNAME
+
+    files = [(uploaded_file.name, uploaded_file.getvalue()) for uploaded_file in uploaded_files]
+    file_hash = uploads_hash([data for _, data in files])
+    try:
+        students = load_student_data(file_hash, files)
+    except ValueError as e:
+        st.error(f"❌ {e}")
+        st.stop()
+    df = students.df
+    if len(files) > 1:
+        st.caption(f"{len(df)} students across {len(files)} files")
+    
+    # Links checked at upload time; these students are not looked up
+    link_problems = students.link_problems
+    if len(link_problems):
+        with st.expander(f"⚠️ {len(link_problems)} students have profile links that cannot be used"):
+            st.dataframe(link_problems, hide_index=True, use_container_width=True)
+            st.download_button(
+                label="📥 Download Invalid Link Report (CSV)",
+                data=link_problems.to_csv(index=False),
+                file_name=f"invalid_profile_links_{file_hash[:8]}.csv",
+                mime=CSV_MIME
+            )
+
+    # Kept in bulk exports, but the journal and history are keyed by roll number
+    missing_roll_numbers = students.missing_roll_numbers
+    if len(missing_roll_numbers):
+        with st.expander(f"⚠️ {len(missing_roll_numbers)} students have no roll number"):
+            st.caption("They are included in bulk exports but cannot be looked up, "
+                       "resumed from a checkpoint or tracked in the progress history.")
+            st.dataframe(missing_roll_numbers, hide_index=True, use_container_width=True)
     
     # Sidebar for navigation
     st.sidebar.title("Navigation")
     option = st.sidebar.selectbox("Choose Option", ["Individual Student", "Bulk Data Download"])
+    force_refresh = st.sidebar.checkbox(
+        "Force refresh",
+        help="Ignore cached LeetCode and HackerRank responses and fetch them again"
+    )
 
     if option == "Individual Student":
+        from enrichment import HACKERRANK_SERVICE, LEETCODE_SERVICE
+
         st.header("Individual Student Analysis")
         
         roll = st.text_input("Enter Roll Number (e.g., 23A31A4401):").strip().upper()
         if roll:
-            student = df[df['Roll Number'].str.upper() == roll]
-            if not student.empty:
-                data = student.iloc[0]
+            data = students.lookup(roll)
+            if data is not None:
+                # Start every upstream call for this student at once; each tab
+                # then waits only for its own results
+                leetcode = session_profile(LEETCODE_SERVICE, data[LEETCODE_USERNAME], force_refresh)
+                hackerrank = session_profile(HACKERRANK_SERVICE, data[HACKERRANK_USERNAME], force_refresh)
+                
                 # Display basic info
                 col1, col2, col3 = st.columns(3)
                 with col1:
@@ -234,405 +398,206 @@ if uploaded_file is not None:
                 tab1, tab2, tab3 = st.tabs(["🧠 LeetCode Stats", "🎖️ HackerRank Stats", "📊 Performance Summary"])
                 
                 with tab1:
-                    st.markdown("### 🧠 LeetCode Statistics")
-                    leetcode_url = data['LeetCode profile']
-                    
-                    if pd.notna(leetcode_url) and leetcode_url != '' and 'leetcode.com' in str(leetcode_url):
-                        if st.button("Fetch LeetCode Stats", key="leetcode_btn"):
-                            with st.spinner("Fetching LeetCode data..."):
-                                try:
-                                    # Extract username from URL
-                                    username = str(leetcode_url).rstrip('/').split('/')[-1]
-                                    if username in ['profile', 'account', 'login', '']:
-                                        # Try to extract username from URL path
-                                        url_parts = str(leetcode_url).split('/')
-                                        username = next((part for part in url_parts if part.startswith('u/') or part.startswith('profile/')), '').replace('u/', '').replace('profile/', '')
-                                    
-                                    if username:
-                                        # LeetCode Stats API
-                                        stats_api_url = f"https://leetcode-stats-api.herokuapp.com/{username}"
-                                        stats_response = requests.get(stats_api_url, timeout=10)
-                                        
-                                        if stats_response.status_code == 200:
-                                            stats = stats_response.json()
-                                            
-                                            # Display basic stats
-                                            col1, col2, col3, col4 = st.columns(4)
-                                            with col1:
-                                                st.metric("✅ Total Solved", stats.get('totalSolved', 0))
-                                            with col2:
-                                                st.metric("⭐ Easy Problems", stats.get('easySolved', 0))
-                                            with col3:
-                                                st.metric("🟠 Medium Problems", stats.get('mediumSolved', 0))
-                                            with col4:
-                                                st.metric("🔴 Hard Problems", stats.get('hardSolved', 0))
-                                            
-                                            # Additional stats if available
-                                            if 'acceptanceRate' in stats:
-                                                st.metric("📈 Acceptance Rate", f"{stats['acceptanceRate']:.1f}%")
-                                            if 'ranking' in stats:
-                                                st.metric("🏆 Ranking", stats['ranking'])
-                                        
-                                        # Try to fetch submission timeline (Alternative API)
-                                        st.markdown("#### 📅 Recent Activity Timeline")
-                                        try:
-                                            # GraphQL query for LeetCode submissions
-                                            graphql_url = "https://leetcode.com/graphql"
-                                            query = """
-                                            query recentSubmissions($username: String!) {
-                                                recentSubmissionList(username: $username) {
-                                                    title
-                                                    titleSlug
-                                                    timestamp
-                                                    statusDisplay
-                                                    lang
-                                                }
-                                            }
-                                            """
-                                            
-                                            headers = {
-                                                'Content-Type': 'application/json',
-                                                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-                                            }
-                                            
-                                            response = requests.post(
-                                                graphql_url, 
-                                                json={'query': query, 'variables': {'username': username}}, 
-                                                headers=headers,
-                                                timeout=10
-                                            )
-                                            
-                                            if response.status_code == 200:
-                                                submission_data = response.json()
-                                                submissions = submission_data.get('data', {}).get('recentSubmissionList', [])
-                                                
-                                                if submissions:
-                                                    # Create DataFrame for submissions
-                                                    df_submissions = pd.DataFrame(submissions[:10])  # Show last 10 submissions
-                                                    df_submissions['timestamp'] = pd.to_datetime(df_submissions['timestamp'], unit='s')
-                                                    df_submissions['date'] = df_submissions['timestamp'].dt.strftime('%Y-%m-%d %H:%M')
-                                                    
-                                                    st.dataframe(
-                                                        df_submissions[['title', 'statusDisplay', 'lang', 'date']], 
-                                                        use_container_width=True
-                                                    )
-                                                else:
-                                                    st.info("No recent submissions found or profile is private.")
-                                            else:
-                                                st.warning("Could not fetch submission timeline. Profile might be private.")
-                                        
-                                        except Exception as e:
-                                            st.warning(f"Timeline fetch failed: Could not retrieve submission history")
-                                        
-                                    else:
-                                        st.error("Could not extract username from LeetCode URL")
-                                
-                                except requests.exceptions.RequestException:
-                                    st.error("Failed to fetch LeetCode stats. Please check the URL or try again later.")
-                                except Exception as e:
-                                    st.error(f"An error occurred: {str(e)}")
-                    else:
-                        st.warning("No valid LeetCode URL found for this student.")
+                    show_leetcode_panel(data, leetcode)
                 
                 with tab2:
-                    st.markdown("### 🎖️ HackerRank Statistics")
-                    hackerrank_url = data['Hackerrank profile']
-                    
-                    if pd.notna(hackerrank_url) and hackerrank_url != '' and 'hackerrank.com' in str(hackerrank_url):
-                        if st.button("Fetch HackerRank Stats", key="hackerrank_btn"):
-                            with st.spinner("Fetching HackerRank data..."):
-                                try:
-                                    # Extract username from URL
-                                    username = str(hackerrank_url).rstrip('/').split('/')[-1]
-                                    
-                                    # Display the badge image first
-                                    badge_image_url = f"https://hackerrank-badges.vercel.app/{username}"
-                                    st.image(badge_image_url, caption=f"HackerRank Badges for {username}", use_column_width=True)
-                                    
-                                    # Use the new SVG parsing function
-                                    st.markdown("#### 🏆 Badge Details")
-                                    
-                                    badges = fetch_hackerrank_badges_svg(username)
-                                    
-                                    if badges:
-                                        st.success(f"✅ Successfully extracted {len(badges)} badges!")
-                                        
-                                        # Create DataFrame for better display
-                                        badges_df = pd.DataFrame(badges)
-                                        
-                                        # Display badges in a nice format
-                                        st.dataframe(badges_df, use_container_width=True)
-                                        
-                                        # Show summary statistics
-                                        total_badges = len(badges)
-                                        total_stars = sum(badge['Stars'] for badge in badges if isinstance(badge['Stars'], int))
-                                        avg_stars = total_stars / total_badges if total_badges > 0 else 0
-                                        
-                                        # Display summary metrics
-                                        col1, col2, col3 = st.columns(3)
-                                        with col1:
-                                            st.metric("🎖️ Total Badges", total_badges)
-                                        with col2:
-                                            st.metric("⭐ Total Stars", total_stars)
-                                        
-                                        # Show badges grouped by star count
-                                        st.markdown("#### ⭐ Badges by Star Rating")
-                                        star_groups = {}
-                                        for badge in badges:
-                                            stars = badge['Stars']
-                                            if isinstance(stars, int):
-                                                if stars not in star_groups:
-                                                    star_groups[stars] = []
-                                                star_groups[stars].append(badge['Badge Name'])
-                                        
-                                        for stars in sorted(star_groups.keys(), reverse=True):
-                                            badge_names = ", ".join(star_groups[stars])
-                                            star_emoji = "⭐" * stars if stars > 0 else "⚪"
-                                            st.write(f"{star_emoji} **{stars} Star{'s' if stars != 1 else ''}:** {badge_names}")
-                                        
-                                        # Export badges data
-                                        st.markdown("#### 📥 Export Badge Data")
-                                        badges_json = json.dumps(badges, indent=2)
-                                        st.download_button(
-                                            label="Download Badge Data as JSON",
-                                            data=badges_json,
-                                            file_name=f"hackerrank_badges_{username}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
-                                            mime="application/json"
-                                        )
-                                        
-                                    else:
-                                        st.warning("⚠️ Could not extract badge information from the SVG.")
-                                        
-                                        # Provide manual entry option
-                                        st.markdown("### ✏️ Manual Badge Entry")
-                                        st.info("Since automatic extraction failed, you can manually enter badge information by looking at the image above.")
-                                        
-                                        with st.form(f"manual_badges_{username}"):
-                                            st.markdown("**Enter badge information manually:**")
-                                            
-                                            num_badges = st.number_input("How many badges do you see?", min_value=0, max_value=20, value=0)
-                                            
-                                            manual_badges = []
-                                            if num_badges > 0:
-                                                for i in range(num_badges):
-                                                    col1, col2 = st.columns(2)
-                                                    with col1:
-                                                        badge_name = st.text_input(f"Badge {i+1} Name:", key=f"name_{i}")
-                                                    with col2:
-                                                        badge_stars = st.number_input(f"Badge {i+1} Stars:", min_value=0, max_value=5, value=0, key=f"stars_{i}")
-                                                    
-                                                    if badge_name:
-                                                        manual_badges.append({"Badge Name": badge_name, "Stars": badge_stars})
-                                            
-                                            submitted = st.form_submit_button("💾 Save Manual Badges")
-                                            
-                                            if submitted and manual_badges:
-                                                st.success(f"✅ Manually entered {len(manual_badges)} badges!")
-                                                manual_df = pd.DataFrame(manual_badges)
-                                                st.dataframe(manual_df, use_container_width=True)
-                                                
-                                                # Show summary for manual badges
-                                                total_manual_stars = sum(badge['Stars'] for badge in manual_badges)
-                                                st.metric("Total Manual Stars", total_manual_stars)
-                                        
-                                        # Show troubleshooting tips
-                                        with st.expander("🔧 Troubleshooting Tips"):
-                                            st.markdown("""
-                                            **Common issues and solutions:**
-                                            
-                                            1. **Profile is Private**: Make sure the HackerRank profile is public
-                                            2. **Username Issue**: Check if the username extracted from URL is correct
-                                            3. **No Badges**: User might not have earned any badges yet
-                                            4. **Server Issue**: The badge service might be temporarily down
-                                            5. **SVG Structure Changed**: The badge generator might have updated its format
-                                            
-                                            **What you can do:**
-                                            - Enable debug mode above to see the raw SVG structure
-                                            - Try accessing the URL directly: `https://hackerrank-badges.vercel.app/{username}`
-                                            - Use manual entry if automatic parsing fails
-                                            """)
-                                    
-                                except requests.exceptions.RequestException:
-                                    st.error("Failed to fetch HackerRank data. Please check the URL or try again later.")
-                                except Exception as e:
-                                    st.error(f"An error occurred: {str(e)}")
-                                    
-                                    # Show error details in debug mode
-                                    if st.checkbox("Show error details", key=f"error_debug_{username}"):
-                                        st.code(str(e))
-                    else:
-                        st.warning("No valid HackerRank URL found for this student.")
+                    show_hackerrank_panel(data, hackerrank)
                 
                 with tab3:
-                    st.markdown("### 📊 Performance Summary")
-                    
-                    # Performance metrics
-                    #cgpa_status = "Excellent" if data['CGPA'] >= 9.0 else "Good" if data['CGPA'] >= 8.0 else "Average" if data['CGPA'] >= 7.0 else "Below Average"
-                    #backlog_status = "No Backlogs" if data['Total Backlogs'] == 0 else f"{data['Total Backlogs']} Backlog(s)"
-                   
-                    #col1, col2 = st.columns(2)
-                    #with col1:
-                     #   st.info(f"**CGPA Status:** {cgpa_status}")
-                      #  st.info(f"**Backlog Status:** {backlog_status}") 
-    
-                    st.info(f"**HackerRank Profile:** {'✅ Available' if pd.notna(data['Hackerrank profile']) else '❌ Not Available'}")
-                    st.info(f"**LeetCode Profile:** {'✅ Available' if pd.notna(data['LeetCode profile']) else '❌ Not Available'}")
+                    show_summary_panel(data)
             else:
                 st.error("❌ Roll number not found.")
     
     elif option == "Bulk Data Download":
+        from analytics import COHORT, SOLVED, STARS, cohort_labels
+        from enrichment import DEFAULT_HOST_LIMITS
+        from history import get_history
+        from jobs import FAILED, get_job_runner
+        from scraper import HACKERRANK_BADGES_HOST, LEETCODE_STATS_HOST
+
         st.header("Bulk Data Download")
         
         st.markdown("Download comprehensive data for all students including LeetCode and HackerRank statistics.")
         
+        # Per-service concurrency caps; the client adapts below them to each upstream's health
+        col1, col2 = st.columns(2)
+        with col1:
+            leetcode_workers = st.number_input(
+                "Max parallel LeetCode requests", min_value=1, max_value=MAX_LIMIT,
+                value=DEFAULT_HOST_LIMITS[LEETCODE_STATS_HOST],
+                help="Parallelism grows towards this while LeetCode answers quickly and shrinks on 429s, errors or slowdowns"
+            )
+        with col2:
+            hackerrank_workers = st.number_input(
+                "Max parallel HackerRank requests", min_value=1, max_value=MAX_LIMIT,
+                value=DEFAULT_HOST_LIMITS[HACKERRANK_BADGES_HOST],
+                help="Parallelism grows towards this while the badge service answers quickly and shrinks on 429s, errors or slowdowns"
+            )
+        
+        # Resume interrupted runs of the same upload from the checkpoint journal
+        freshness_hours = st.number_input(
+            "Reuse results from earlier runs newer than (hours)", min_value=0, max_value=24 * 30,
+            value=FRESHNESS_SECONDS // 3600,
+            help="Students fetched successfully within this window are not fetched again"
+        )
+        journal = get_journal()
+        reusable = len(journal.completed(file_hash, freshness_hours * 3600))
+        if reusable and not force_refresh:
+            st.info(f"♻️ {reusable} lookups from an earlier run of this file will be reused. Only failed or missing students will be fetched.")
+        
+        runner = get_job_runner()
         if st.button("📥 Generate and Download Student Data", key="bulk_download"):
-            with st.spinner("Fetching data for all students... This may take a while..."):
-                
-                # Create a copy of the original dataframe
-                enhanced_df = df.copy()
-                
-                # Add new columns for enhanced data
-                enhanced_df['LeetCode_Total_Solved'] = ''
-                enhanced_df['LeetCode_Easy_Solved'] = ''
-                enhanced_df['LeetCode_Medium_Solved'] = ''
-                enhanced_df['LeetCode_Hard_Solved'] = ''
-                enhanced_df['LeetCode_Status'] = ''
-                enhanced_df['HackerRank_Total_Badges'] = ''
-                enhanced_df['HackerRank_Total_Stars'] = ''
-                #enhanced_df['HackerRank_Badge_Details'] = ''
-                enhanced_df['HackerRank_Status'] = ''
-                #enhanced_df['Data_Fetch_Timestamp'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                
-                progress_bar = st.progress(0)
-                status_text = st.empty()
-                
-                total_students = len(enhanced_df)
-                
-                for idx, row in enhanced_df.iterrows():
-                    progress = (idx + 1) / total_students
-                    progress_bar.progress(progress)
-                    status_text.text(f"Processing student {idx + 1}/{total_students}: {row['Roll Number']}")
-                    
-                    # Fetch LeetCode data
-                    leetcode_url = row['LeetCode profile']
-                    if pd.notna(leetcode_url) and leetcode_url != '' and 'leetcode.com' in str(leetcode_url):
-                        try:
-                            username = str(leetcode_url).rstrip('/').split('/')[-1]
-                            if username not in ['profile', 'account', 'login', '']:
-                                stats_api_url = f"https://leetcode-stats-api.herokuapp.com/{username}"
-                                stats_response = requests.get(stats_api_url, timeout=5)
-                                
-                                if stats_response.status_code == 200:
-                                    stats = stats_response.json()
-                                    enhanced_df.at[idx, 'LeetCode_Total_Solved'] = stats.get('totalSolved', 0)
-                                    enhanced_df.at[idx, 'LeetCode_Easy_Solved'] = stats.get('easySolved', 0)
-                                    enhanced_df.at[idx, 'LeetCode_Medium_Solved'] = stats.get('mediumSolved', 0)
-                                    enhanced_df.at[idx, 'LeetCode_Hard_Solved'] = stats.get('hardSolved', 0)
-                                    enhanced_df.at[idx, 'LeetCode_Status'] = 'Success'
-                                else:
-                                    enhanced_df.at[idx, 'LeetCode_Status'] = 'Failed'
-                        except:
-                            enhanced_df.at[idx, 'LeetCode_Status'] = 'Error'
-                    else:
-                        enhanced_df.at[idx, 'LeetCode_Status'] = 'No URL'
-                    
-                    # Fetch HackerRank data using new SVG parsing method
-                    hackerrank_url = row['Hackerrank profile']
-                    if pd.notna(hackerrank_url) and hackerrank_url != '' and 'hackerrank.com' in str(hackerrank_url):
-                        try:
-                            username = str(hackerrank_url).rstrip('/').split('/')[-1]
-                            badges = fetch_hackerrank_badges_svg(username)
-                            
-                            if badges:
-                                total_badges = len(badges)
-                                total_stars = sum(badge['Stars'] for badge in badges if isinstance(badge['Stars'], (int, float)))
-                                badge_summary = "; ".join([f"{badge['Badge Name']}({badge['Stars']}★)" for badge in badges])
-                                
-                                enhanced_df.at[idx, 'HackerRank_Total_Badges'] = total_badges
-                                enhanced_df.at[idx, 'HackerRank_Total_Stars'] = total_stars
-                                #enhanced_df.at[idx, 'HackerRank_Badge_Details'] = badge_summary
-                                enhanced_df.at[idx, 'HackerRank_Status'] = 'Success'
-                            else:
-                                enhanced_df.at[idx, 'HackerRank_Status'] = 'No Badges Found'
-                        except:
-                            enhanced_df.at[idx, 'HackerRank_Status'] = 'Error'
-                    else:
-                        enhanced_df.at[idx, 'HackerRank_Status'] = 'No URL'
-                    
-                    # Add small delay to avoid overwhelming servers
-                    time.sleep(0.2)  # Slightly increased delay for better reliability
-                
-                progress_bar.progress(1.0)
-                status_text.text("Data processing completed!")
-                
-                # Create downloadable file
-                timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-                filename = f"student_data_enhanced_{timestamp}.xlsx"
-                
-                # Convert to Excel
-                output = BytesIO()
-                with pd.ExcelWriter(output, engine='openpyxl') as writer:
-                    enhanced_df.to_excel(writer, index=False, sheet_name='Student_Data')
+            # Runs on a background worker, so reruns and refreshes do not lose the work
+            job, created = runner.submit(
+                df,
+                file_hash,
+                host_limits={
+                    LEETCODE_STATS_HOST: leetcode_workers,
+                    HACKERRANK_BADGES_HOST: hackerrank_workers,
+                },
+                force_refresh=force_refresh,
+                journal=journal,
+                freshness=freshness_hours * 3600,
+            )
+            # Kept in the URL so a browser refresh finds the job again
+            st.query_params['job'] = job.id
+            if not created:
+                st.info(f"🔗 This file is already being processed (job {job.id}). Showing its progress.")
+        
+        job_id = st.query_params.get('job')
+        job = runner.get(job_id) if job_id else None
+        if job is not None and job.upload_hash == file_hash:
+            if not job.finished:
+                show_job_progress(job.id)
+            elif job.status == FAILED:
+                st.error(f"❌ Bulk export {job.id} failed: {job.error}")
+            else:
+                run_metrics = job.metrics
+                total_students = job.total
+                timestamp = datetime.fromtimestamp(job.submitted_at).strftime('%Y%m%d_%H%M%S')
+                basename = f"student_data_enhanced_{timestamp}"
                 
-                # Create download button
+                # Create download buttons
                 st.success("✅ Data processing completed!")
-                st.download_button(
-                    label="📥 Download Enhanced Student Data (Excel)",
-                    data=output.getvalue(),
-                    file_name=filename,
-                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-                )
+                with open(job.xlsx_path, 'rb') as xlsx_file:
+                    st.download_button(
+                        label="📥 Download Enhanced Student Data (Excel)",
+                        data=xlsx_file,
+                        file_name=f"{basename}.xlsx",
+                        mime=XLSX_MIME
+                    )
                 
                 # Also provide CSV option
-                csv = enhanced_df.to_csv(index=False)
-                csv_filename = f"student_data_enhanced_{timestamp}.csv"
-                st.download_button(
-                    label="📥 Download Enhanced Student Data (CSV)",
-                    data=csv,
-                    file_name=csv_filename,
-                    mime="text/csv"
-                )
+                with open(job.csv_path, 'rb') as csv_file:
+                    st.download_button(
+                        label="📥 Download Enhanced Student Data (CSV)",
+                        data=csv_file,
+                        file_name=f"{basename}.csv",
+                        mime=CSV_MIME
+                    )
                 
                 # Display summary statistics
+                analytics = load_cohort_analytics(job.id, job)
+                summary = analytics.summary
                 st.markdown("### 📈 Summary Statistics")
                 col1, col2, col3, col4 = st.columns(4)
                 
                 with col1:
-                    leetcode_success = len(enhanced_df[enhanced_df['LeetCode_Status'] == 'Success'])
-                    st.metric("LeetCode Data Fetched", f"{leetcode_success}/{total_students}")
+                    st.metric("LeetCode Data Fetched", f"{summary['leetcode_success']}/{total_students}")
                 
                 with col2:
-                    hackerrank_success = len(enhanced_df[enhanced_df['HackerRank_Status'] == 'Success'])
-                    st.metric("HackerRank Data Fetched", f"{hackerrank_success}/{total_students}")
+                    st.metric("HackerRank Data Fetched", f"{summary['hackerrank_success']}/{total_students}")
                 
                 with col3:
-                    avg_cgpa = enhanced_df['CGPA'].mean()
-                    st.metric("Average CGPA", f"{avg_cgpa:.2f}")
+                    avg_cgpa = summary['average_cgpa']
+                    st.metric("Average CGPA", "-" if pd.isna(avg_cgpa) else f"{avg_cgpa:.2f}")
                 
                 with col4:
-                    students_with_backlogs = len(enhanced_df[enhanced_df['Total Backlogs'] > 0])
-                    st.metric("Students with Backlogs", f"{students_with_backlogs}/{total_students}")
+                    st.metric("Students with Backlogs", f"{summary['with_backlogs']}/{total_students}")
                 
                 # Additional HackerRank statistics
-                if hackerrank_success > 0:
-                    # Convert badge counts to numeric, handling empty strings
-                    badge_counts = pd.to_numeric(enhanced_df['HackerRank_Total_Badges'], errors='coerce').fillna(0)
-                    star_counts = pd.to_numeric(enhanced_df['HackerRank_Total_Stars'], errors='coerce').fillna(0)
-                    
+                if summary['hackerrank_success'] > 0:
                     st.markdown("#### 🎖️ HackerRank Badge Statistics")
                     col1, col2, col3 = st.columns(3)
                     
                     with col1:
-                        avg_badges = badge_counts.mean()
-                        st.metric("Average Badges per Student", f"{avg_badges:.1f}")
+                        st.metric("Average Badges per Student", f"{summary['average_badges']:.1f}")
                     
                     with col2:
-                        avg_stars = star_counts.mean()
-                        st.metric("Average Stars per Student", f"{avg_stars:.1f}")
+                        st.metric("Average Stars per Student", f"{summary['average_stars']:.1f}")
                     
                     with col3:
-                        max_badges = badge_counts.max()
-                        st.metric("Maximum Badges", f"{int(max_badges)}")
+                        st.metric("Maximum Badges", f"{int(summary['max_badges'])}")
+                
+                # Rankings and spread within each section and admission year
+                st.markdown("#### 🏆 Leaderboards")
+                top_n = st.number_input("Students per leaderboard", min_value=1, max_value=100, value=10)
+                col1, col2 = st.columns(2)
+                with col1:
+                    st.markdown("**LeetCode problems solved**")
+                    st.dataframe(analytics.top(SOLVED, top_n).round(1), hide_index=True, use_container_width=True)
+                with col2:
+                    st.markdown("**HackerRank stars**")
+                    st.dataframe(analytics.top(STARS, top_n).round(1), hide_index=True, use_container_width=True)
+                
+                for group, table in analytics.percentiles.items():
+                    st.markdown(f"#### 📊 Percentiles by {group}")
+                    st.dataframe(table.round(2), hide_index=True, use_container_width=True)
+                
+                st.markdown("#### 🔗 CGPA vs Coding Activity")
+                st.dataframe(analytics.correlation.round(3), hide_index=True, use_container_width=True)
+                
+                # Upstream timings for tuning the parallel request settings
+                st.markdown("#### 🌐 Upstream Performance")
+                host_rows = summary_rows(run_metrics)
+                if host_rows:
+                    st.dataframe(pd.DataFrame(host_rows).round(1), hide_index=True, use_container_width=True)
+                else:
+                    st.info("No upstream requests were made in this run; all data came from the cache or earlier runs.")
+                
+                col1, col2, col3 = st.columns(3)
+                with col1:
+                    parse_p95 = histogram_quantile(run_metrics['parse'], 0.95)
+                    st.metric("Badge SVG Parse p95", "-" if parse_p95 is None else f"{parse_p95 * 1000:.1f} ms")
+                with col2:
+                    cache_counts = run_metrics['cache'].values()
+                    cache_hits = sum(counts.get('hit', 0) + counts.get('negative_hit', 0) for counts in cache_counts)
+                    cache_lookups = cache_hits + sum(counts.get('miss', 0) for counts in cache_counts)
+                    revalidated = sum(counts.get('revalidated', 0) for counts in cache_counts)
+                    st.metric("Cache Hits", f"{cache_hits}/{cache_lookups}",
+                              help=f"Includes cached missing or private profiles. {revalidated} of the misses were answered 304 Not Modified")
+                with col3:
+                    st.download_button(
+                        label="📊 Metrics (JSON)",
+                        data=to_json(run_metrics),
+                        file_name=f"{basename}_metrics.json",
+                        mime="application/json"
+                    )
+                    st.download_button(
+                        label="📊 Metrics (Prometheus)",
+                        data=to_prometheus(run_metrics),
+                        file_name=f"{basename}_metrics.prom",
+                        mime="text/plain"
+                    )
+        
+        # Growth between bulk runs of these students, from the local history store
+        st.markdown("### 📅 Progress Over Time")
+        since = st.date_input("Compare with the last run on or before", value=datetime.now().date() - timedelta(days=30))
+        deltas = get_history().deltas(datetime.combine(since, datetime.max.time()), roll_numbers=df['Roll Number'])
+        if deltas.empty:
+            st.info("No earlier bulk runs of these students have been recorded yet.")
+        else:
+            deltas[COHORT] = cohort_labels(deltas.index.to_series())
+            solved_change = f'{SOLVED}_Change'
+            stars_change = f'{STARS}_Change'
+            by_cohort = deltas.groupby(COHORT).agg(
+                Students=(solved_change, 'size'),
+                Improved=(solved_change, lambda change: int(change.gt(0).sum())),
+                **{'Mean solved change': (solved_change, 'mean'), 'Mean stars change': (stars_change, 'mean')},
+            )
+            st.dataframe(by_cohort.round(1), use_container_width=True)
+            columns = [f'{col}_{stage}' for col in (SOLVED, STARS) for stage in ('Before', 'Now', 'Change')]
+            st.dataframe(deltas.sort_values(solved_change, ascending=False)[columns], use_container_width=True)
 
 else:
     st.info("Please upload a CSV file to proceed.")
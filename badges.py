@@ -0,0 +1,262 @@
+import re
+import threading
+import time
+from bisect import bisect_right
+from collections import OrderedDict
+
+from lxml import etree
+
+from blobstore import content_digest
+
+# Predefined list of valid HackerRank badges
+VALID_HACKERRANK_BADGES = frozenset({
+    'Problem Solving', 'Java', 'Python', 'C Language', 'Cpp', 'C#', 'JavaScript',
+    'Sql', '30 Days of Code', '10 Days of JavaScript', '10 Days of Statistics',
+    'Algorithms', 'Data Structures', 'Regex', 'Artificial Intelligence',
+    'Databases', 'Shell', 'Linux Shell', 'Functional Programming',
+    'Mathematics', 'Days of ML', 'Rust', 'Kotlin', 'Swift', 'Scala',
+    'Ruby', 'Go', 'Statistics', 'Interview Preparation Kit',
+    'Object Oriented Programming', 'Security'
+})
+
+# Substrings that mark a text node as a possible badge name
+BADGE_KEYWORDS = (
+    'java', 'python', 'sql', 'javascript', 'cpp', 'problem solving',
+    'algorithms', 'data structures', '30 days', '10 days', 'ruby',
+    'swift', 'golang', 'rust', 'kotlin', 'scala', 'c', 'shell',
+    'functional programming', 'object oriented programming',
+)
+
+TRANSLATE_RE = re.compile(r'translate\(([^,]+),\s*([^)]+)\)')
+
+# How many ancestors of a badge name are searched for its star section
+MAX_ANCESTOR_LEVELS = 5
+
+# Position standing for the document node above the root element
+DOCUMENT = -1
+
+# Parsed badge lists remembered by get_badge_memo()
+BADGE_MEMO_ENTRIES = 4096
+
+
+class _SvgIndex:
+    """
+    Preorder index of an SVG document built in one pass
+    Every element gets a preorder position and the position of its last
+    descendant, so "first star section under X" and "badge stars under X"
+    become binary searches over sorted position lists.
+    """
+
+    def __init__(self, root):
+        self.elements = []
+        self.position = {}
+        for elem in root.iter():
+            if isinstance(elem.tag, str):
+                self.position[elem] = len(self.elements)
+                self.elements.append(elem)
+
+        # Position of the last descendant of each element, filled bottom-up
+        self.last = list(range(len(self.elements)))
+        for pos in range(len(self.elements) - 1, -1, -1):
+            parent = self.elements[pos].getparent()
+            if parent is not None:
+                parent_pos = self.position[parent]
+                if self.last[pos] > self.last[parent_pos]:
+                    self.last[parent_pos] = self.last[pos]
+
+        self.texts = []
+        self.star_sections = []
+        self.badge_stars = []
+        for pos, elem in enumerate(self.elements):
+            name = etree.QName(elem).localname
+            css_class = elem.get('class')
+            if name == 'text':
+                self.texts.append(pos)
+            elif name == 'g' and css_class == 'star-section':
+                self.star_sections.append(pos)
+            elif name == 'svg' and css_class == 'badge-star':
+                self.badge_stars.append(pos)
+
+    def descendants(self, pos):
+        """Open-closed preorder range covering the descendants of pos"""
+        if pos == DOCUMENT:
+            return DOCUMENT, self.last[0]
+        return pos, self.last[pos]
+
+    def parent(self, pos):
+        """Preorder position of the parent, DOCUMENT for the root, None above that"""
+        if pos == DOCUMENT:
+            return None
+        parent = self.elements[pos].getparent()
+        return self.position[parent] if parent is not None else DOCUMENT
+
+    def first_star_section(self, pos):
+        low, high = self.descendants(pos)
+        i = bisect_right(self.star_sections, low)
+        if i < len(self.star_sections) and self.star_sections[i] <= high:
+            return self.star_sections[i]
+        return None
+
+    def count_badge_stars(self, pos):
+        low, high = self.descendants(pos)
+        return bisect_right(self.badge_stars, high) - bisect_right(self.badge_stars, low)
+
+
+def _to_coordinate(value):
+    return float(value) if str(value).replace('.', '').replace('-', '').isdigit() else 0
+
+
+def parse_badges_svg(svg_xml):
+    """
+    Extract badge names and star counts from a hackerrank-badges SVG
+    Returns list of dictionaries with badge names and star counts, or None
+    """
+    if isinstance(svg_xml, str):
+        svg_xml = svg_xml.encode('utf-8')
+    try:
+        root = etree.fromstring(svg_xml, etree.XMLParser(recover=True, strip_cdata=False))
+    except etree.XMLSyntaxError:
+        return None
+    if root is None:
+        return None
+
+    index = _SvgIndex(root)
+
+    # Text of every <text> node, and the first node for each lowercased text
+    all_texts = []
+    text_elements = {}
+    for pos in index.texts:
+        text_content = ''.join(index.elements[pos].itertext()).strip()
+        text_elements.setdefault(text_content.lower(), pos)
+        if len(text_content) > 1:
+            all_texts.append(text_content)
+
+    # Star section positions, parsed once for the positional fallback
+    star_positions = []
+    for pos in index.star_sections:
+        transform = index.elements[pos].get('transform', '')
+        if 'translate' in transform:
+            translate_match = TRANSLATE_RE.search(transform)
+            if translate_match:
+                try:
+                    star_positions.append((pos, float(translate_match.group(1)), float(translate_match.group(2))))
+                except ValueError:
+                    continue
+
+    # Even share of all stars, used when a badge cannot be matched to a section
+    keyword_texts = sum(1 for t in all_texts if any(kw in t.lower() for kw in BADGE_KEYWORDS))
+    fallback_stars = len(index.badge_stars) // keyword_texts if keyword_texts else 0
+
+    seen = set()
+    unique_badges = []
+    for text in all_texts:
+        text_lower = text.lower()
+        badge_name = text.title()
+        badge_key = badge_name.lower()
+        if badge_key in seen or badge_name not in VALID_HACKERRANK_BADGES:
+            continue
+        if not any(keyword in text_lower for keyword in BADGE_KEYWORDS):
+            continue
+        seen.add(badge_key)
+
+        stars = 0
+        if index.star_sections:
+            stars = _badge_stars(index, text_elements[text_lower], star_positions, fallback_stars)
+
+        unique_badges.append({
+            'Badge Name': badge_name,
+            'Stars': stars
+        })
+
+    return unique_badges if unique_badges else None
+
+
+def parse_badges_timed(svg_xml):
+    """
+    parse_badges_svg for worker processes
+    Returns (badges, seconds spent parsing)
+    """
+    start = time.perf_counter()
+    badges = parse_badges_svg(svg_xml)
+    return badges, time.perf_counter() - start
+
+
+def _badge_stars(index, text_pos, star_positions, fallback_stars):
+    # Strategy 1: nearest ancestor (up to MAX_ANCESTOR_LEVELS) containing a star section
+    current = text_pos
+    for level in range(MAX_ANCESTOR_LEVELS):
+        if current is None:
+            break
+        star_section = index.first_star_section(current)
+        if star_section is not None:
+            return index.count_badge_stars(star_section)
+        parent = index.parent(current)
+        if parent is not None:
+            star_section = index.first_star_section(parent)
+            if star_section is not None:
+                return index.count_badge_stars(star_section)
+        current = parent
+
+    # Strategy 2: closest star section by translate() offset
+    text_elem = index.elements[text_pos]
+    try:
+        text_x = _to_coordinate(text_elem.get('x', '0'))
+        text_y = _to_coordinate(text_elem.get('y', '0'))
+    except ValueError:
+        text_x = text_y = None
+    if text_x is not None:
+        closest_star_section = None
+        min_distance = float('inf')
+        for pos, star_x, star_y in star_positions:
+            try:
+                distance = ((star_x - text_x) ** 2 + (star_y - text_y) ** 2) ** 0.5
+            except OverflowError:
+                continue
+            if distance < min_distance:
+                min_distance = distance
+                closest_star_section = pos
+        if closest_star_section is not None:
+            return index.count_badge_stars(closest_star_section)
+
+    # Strategy 3: simple distribution of all stars among badges
+    return fallback_stars
+
+
+class BadgeMemo:
+    """
+    Parsed badge lists keyed by the content digest of the SVG they came from
+    SVGs served from the blob store or revalidated with a 304 are unchanged,
+    and many users share the same SVG, so their badges are looked up here
+    instead of being parsed again. The max_entries most recently used
+    results are kept.
+    """
+
+    def __init__(self, max_entries=BADGE_MEMO_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, svg_xml):
+        """Return (found, badges) for an SVG parsed before"""
+        key = content_digest(svg_xml)
+        with self._lock:
+            if key not in self._entries:
+                return False, None
+            self._entries.move_to_end(key)
+            return True, self._entries[key]
+
+    def put(self, svg_xml, badges):
+        key = content_digest(svg_xml)
+        with self._lock:
+            self._entries[key] = badges
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+_default_memo = BadgeMemo()
+
+
+def get_badge_memo():
+    """Return the process-wide memo shared by the dashboard and bulk runs"""
+    return _default_memo
@@ -0,0 +1,72 @@
+"""
+Regression check for the HackerRank badge parser
+
+Each SVG under bench/fixtures/badges is parsed with parse_badges_svg and the
+result compared with the JSON file of the same name next to it. The saved
+SVGs cover the parser's three star-matching strategies, repeated names and
+downloads that are truncated or not SVG at all. Exits 1 when any result
+differs; --update rewrites the expected files after an intended change.
+
+    python -m bench.badge_corpus
+"""
+import argparse
+import json
+import os
+import sys
+
+from badges import parse_badges_svg
+from bench.fake_upstreams import FIXTURES_DIR
+
+CORPUS_DIR = os.path.join(FIXTURES_DIR, 'badges')
+
+
+def corpus_files():
+    """SVG files in the corpus, sorted by name"""
+    return sorted(name for name in os.listdir(CORPUS_DIR) if name.endswith('.svg'))
+
+
+def expected_path(svg_name):
+    return os.path.join(CORPUS_DIR, os.path.splitext(svg_name)[0] + '.json')
+
+
+def parse_file(svg_name):
+    with open(os.path.join(CORPUS_DIR, svg_name), 'rb') as f:
+        return parse_badges_svg(f.read())
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='python -m bench.badge_corpus', description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--update', action='store_true', help="Rewrite the expected JSON from the current parser")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    failures = []
+    for svg_name in corpus_files():
+        badges = parse_file(svg_name)
+        path = expected_path(svg_name)
+        if args.update:
+            with open(path, 'w') as f:
+                json.dump(badges, f, indent=2)
+                f.write('\n')
+            print(f"updated {os.path.basename(path)}")
+            continue
+        try:
+            with open(path) as f:
+                expected = json.load(f)
+        except FileNotFoundError:
+            failures.append(f"{svg_name}: no {os.path.basename(path)}, run with --update")
+            continue
+        if badges != expected:
+            failures.append(f"{svg_name}: expected {expected}, got {badges}")
+        else:
+            print(f"ok   {svg_name}")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
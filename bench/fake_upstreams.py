@@ -0,0 +1,239 @@
+"""
+Local stand-ins for the three upstream services, serving recorded fixtures
+
+Each server runs on its own port with configurable latency, error rate and
+429 rate, so the enrichment path can be measured without touching the real
+leetcode-stats-api, leetcode.com/graphql or hackerrank-badges services.
+Usernames starting with 'missing' get a 404. Successful responses carry an
+ETag and conditional requests that match it get a 304. With a capacity,
+requests beyond that many in flight are refused with a 429.
+"""
+import hashlib
+import json
+import multiprocessing
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), 'fixtures')
+
+
+def load_fixture(name):
+    with open(os.path.join(FIXTURES_DIR, name), 'rb') as f:
+        return f.read()
+
+
+class FakeUpstream:
+    """
+    A threaded HTTP server answering every request through respond(method, path, body)
+    latency is the mean response delay in seconds (exponentially distributed
+    around it when jitter is set), error_rate the share of 500s and
+    throttle_rate the share of 429s with a Retry-After header. capacity
+    caps the requests served at once; the rest get a 429 straight away.
+    """
+
+    def __init__(self, respond, latency=0.05, jitter=True, error_rate=0.0, throttle_rate=0.0, capacity=None,
+                 seed=None):
+        self.respond = respond
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.capacity = capacity
+        self.requests = 0
+        self.in_flight = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self._server.server_port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _draw(self):
+        with self._lock:
+            self.requests += 1
+            delay = self._random.expovariate(1 / self.latency) if self.jitter and self.latency > 0 else self.latency
+            roll = self._random.random()
+        return delay, roll
+
+    def _handler_class(self):
+        upstream = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            # Headers and body are written separately; avoid delayed-ACK stalls
+            disable_nagle_algorithm = True
+
+            def _serve(self, method):
+                length = int(self.headers.get('Content-Length') or 0)
+                body = self.rfile.read(length) if length else b''
+                delay, roll = upstream._draw()
+                with upstream._lock:
+                    overloaded = upstream.capacity is not None and upstream.in_flight >= upstream.capacity
+                    if not overloaded:
+                        upstream.in_flight += 1
+                if not overloaded:
+                    time.sleep(delay)
+                    with upstream._lock:
+                        upstream.in_flight -= 1
+
+                headers = {}
+                if overloaded:
+                    status, content_type, payload = 429, 'text/plain', b'Too Many Requests'
+                elif roll < upstream.throttle_rate:
+                    status, content_type, payload = 429, 'text/plain', b'Too Many Requests'
+                    headers['Retry-After'] = '1'
+                elif roll < upstream.throttle_rate + upstream.error_rate:
+                    status, content_type, payload = 500, 'text/plain', b'Internal Server Error'
+                else:
+                    status, content_type, payload = upstream.respond(method, self.path, body)
+                    if status == 200 and method == 'GET':
+                        etag = '"' + hashlib.blake2b(payload, digest_size=8).hexdigest() + '"'
+                        headers['ETag'] = etag
+                        if self.headers.get('If-None-Match') == etag:
+                            status, payload = 304, b''
+
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(payload)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def do_GET(self):
+                self._serve('GET')
+
+            def do_POST(self):
+                self._serve('POST')
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+def _username(path):
+    return path.rstrip('/').split('/')[-1]
+
+
+def leetcode_stats_server(**options):
+    """Stand-in for leetcode-stats-api.herokuapp.com/<username>"""
+    payload = load_fixture('leetcode_stats.json')
+
+    def respond(method, path, body):
+        if _username(path).startswith('missing'):
+            return 404, 'application/json', b'{"status": "error", "message": "user does not exist"}'
+        return 200, 'application/json', payload
+
+    return FakeUpstream(respond, **options)
+
+
+def leetcode_graphql_server(**options):
+    """
+    Stand-in for leetcode.com/graphql answering recentSubmissionList queries
+    and batched matchedUser solved-count queries (one alias per variable)
+    """
+    payload = load_fixture('recent_submissions.json')
+    stats = json.loads(load_fixture('leetcode_stats.json'))
+    solved = {'submitStatsGlobal': {'acSubmissionNum': [
+        {'difficulty': 'All', 'count': stats['totalSolved']},
+        {'difficulty': 'Easy', 'count': stats['easySolved']},
+        {'difficulty': 'Medium', 'count': stats['mediumSolved']},
+        {'difficulty': 'Hard', 'count': stats['hardSolved']},
+    ]}}
+
+    def respond(method, path, body):
+        if method != 'POST':
+            return 405, 'text/plain', b'Method Not Allowed'
+        request = json.loads(body or b'{}')
+        variables = request.get('variables', {})
+        if 'matchedUser' in request.get('query', ''):
+            data = {
+                alias: None if username.startswith('missing') else solved
+                for alias, username in variables.items()
+            }
+            return 200, 'application/json', json.dumps({'data': data}).encode('utf-8')
+        if variables.get('username', '').startswith('missing'):
+            return 200, 'application/json', b'{"data": {"recentSubmissionList": []}}'
+        return 200, 'application/json', payload
+
+    return FakeUpstream(respond, **options)
+
+
+def hackerrank_badges_server(**options):
+    """Stand-in for hackerrank-badges.vercel.app/<username>"""
+    payload = load_fixture('hackerrank_badges.svg')
+
+    def respond(method, path, body):
+        if _username(path).startswith('missing'):
+            return 404, 'text/plain', b'Not Found'
+        return 200, 'image/svg+xml', payload
+
+    return FakeUpstream(respond, **options)
+
+
+SERVER_FACTORIES = {
+    'leetcode_stats': leetcode_stats_server,
+    'leetcode_graphql': leetcode_graphql_server,
+    'hackerrank_badges': hackerrank_badges_server,
+}
+
+
+def _serve_all(connection, options):
+    servers = {name: factory(**options).start() for name, factory in SERVER_FACTORIES.items()}
+    connection.send({name: server.url for name, server in servers.items()})
+    connection.recv()
+    counts = {name: server.requests for name, server in servers.items()}
+    for server in servers.values():
+        server.stop()
+    connection.send(counts)
+
+
+class UpstreamProcess:
+    """
+    Runs all three stand-ins in a child process
+    Keeps the servers' request handling off the benchmarked process's GIL,
+    so measurements reflect the client side only. urls maps service name to
+    base URL while running; requests holds per-service request counts after exit.
+    """
+
+    def __init__(self, **options):
+        self.options = options
+        self.urls = {}
+        self.requests = {}
+        self._connection = None
+        self._process = None
+
+    def __enter__(self):
+        parent, child = multiprocessing.Pipe()
+        self._connection = parent
+        self._process = multiprocessing.Process(target=_serve_all, args=(child, self.options), daemon=True)
+        self._process.start()
+        self.urls = parent.recv()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._connection.send('stop')
+        self.requests = self._connection.recv()
+        self._process.join()
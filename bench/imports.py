@@ -0,0 +1,129 @@
+"""
+Import-time benchmark for cold start
+
+Runs each entry point in a fresh interpreter under `python -X importtime`
+and reports its wall time, the slowest top-level imports and which heavy
+dependencies it loaded. The first page of the dashboard (the upload form)
+must not load any of them.
+
+    python -m bench.imports --repeat 5 --check --budget first_paint=1500
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Dependencies worth deferring: each takes 20-600 ms to import
+HEAVY_MODULES = ('pandas', 'pyarrow', 'requests', 'lxml', 'xlsxwriter', 'openpyxl', 'bs4')
+
+# Entry point -> code timed in the fresh interpreter
+TARGETS = {
+    # Bare-mode run of the script with no file uploaded, as on a dyno's first request
+    'first_paint': "import runpy; runpy.run_path('app.py', run_name='__main__')",
+    'upload': "import schema, mime",
+    'individual': "import prefetch, history, analytics",
+    'bulk': "import jobs, analytics, http_client",
+    'cli': "import cli",
+}
+# Entry points that must not import any of HEAVY_MODULES
+LIGHT_TARGETS = ('first_paint',)
+
+_IMPORT_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+{code}
+elapsed = time.perf_counter() - start
+print(json.dumps([elapsed, sorted(m for m in sys.modules if m.split('.')[0] in {heavy!r})]))
+"""
+
+
+def run_target(code):
+    """
+    Time code in a fresh interpreter
+    Returns (wall seconds, heavy modules loaded, {top-level module: cumulative microseconds})
+    """
+    probe = _PROBE.format(code=code, heavy=set(HEAVY_MODULES))
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE='1')
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', probe],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True,
+    )
+    elapsed, loaded = json.loads(result.stdout.strip().splitlines()[-1])
+    top_level = {}
+    for line in result.stderr.splitlines():
+        match = _IMPORT_LINE.match(line)
+        # importtime indents nested imports by two spaces per level
+        if match and len(match.group(3)) == 1:
+            top_level[match.group(4)] = int(match.group(2))
+    roots = sorted({name.split('.')[0] for name in loaded})
+    return elapsed, roots, top_level
+
+
+def bench_target(code, repeat):
+    runs = [run_target(code) for _ in range(repeat)]
+    walls = [wall for wall, _, _ in runs]
+    # The median run's breakdown is the representative one
+    _, loaded, top_level = sorted(runs, key=lambda run: run[0])[len(runs) // 2]
+    slowest = sorted(top_level.items(), key=lambda item: item[1], reverse=True)[:5]
+    return {
+        'wall_ms_median': statistics.median(walls) * 1000,
+        'wall_ms_min': min(walls) * 1000,
+        'heavy_modules': loaded,
+        'slowest_imports_ms': {name: micros / 1000 for name, micros in slowest},
+    }
+
+
+def parse_budget(value):
+    target, _, ms = value.partition('=')
+    if target not in TARGETS or not ms:
+        raise argparse.ArgumentTypeError(f"expected TARGET=MS with TARGET one of {', '.join(TARGETS)}")
+    return target, float(ms)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='python -m bench.imports', description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--targets', nargs='+', choices=list(TARGETS), default=list(TARGETS))
+    parser.add_argument('--repeat', type=int, default=3, help="Fresh interpreters per target")
+    parser.add_argument('--budget', type=parse_budget, action='append', default=[], metavar='TARGET=MS',
+                        help="Fail when a target's median wall time exceeds MS milliseconds")
+    parser.add_argument('--check', action='store_true',
+                        help=f"Fail when {', '.join(LIGHT_TARGETS)} imports a heavy dependency")
+    parser.add_argument('--json', dest='json_path', help="Also write the results to this JSON file")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    budgets = dict(args.budget)
+    results = {}
+    failures = []
+    print(f"{'target':<12} {'median ms':>10} {'min ms':>8}  heavy modules loaded")
+    for target in args.targets:
+        run = bench_target(TARGETS[target], args.repeat)
+        results[target] = run
+        print(f"{target:<12} {run['wall_ms_median']:>10.0f} {run['wall_ms_min']:>8.0f}  "
+              f"{', '.join(run['heavy_modules']) or '-'}")
+        print("             slowest: " + ", ".join(
+            f"{name} {ms:.0f}" for name, ms in run['slowest_imports_ms'].items()))
+        if args.check and target in LIGHT_TARGETS and run['heavy_modules']:
+            failures.append(f"{target} imports {', '.join(run['heavy_modules'])}")
+        if target in budgets and run['wall_ms_median'] > budgets[target]:
+            failures.append(f"{target} took {run['wall_ms_median']:.0f} ms, budget {budgets[target]:.0f} ms")
+
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump(results, f, indent=2)
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,220 @@
+"""
+Offline benchmark for bulk enrichment and the HackerRank badge parser
+
+Starts local stand-ins for all three upstream APIs, enriches synthetic
+cohorts against them and reports students/second, p50/p95 per-student
+latency and parser CPU time.
+
+    python -m bench.run --sizes 100 1000 10000 --latency 0.05 --error-rate 0.01
+"""
+import argparse
+import json
+import logging
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+import pandas as pd
+
+from bench.fake_upstreams import UpstreamProcess, load_fixture
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of values (0 for an empty list)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[rank]
+
+
+def synthetic_cohort(size, missing_rate=0.02, seed=0):
+    """Student frame with unique usernames; a share of them are unknown upstream"""
+    rng = random.Random(seed)
+    rows = []
+    for i in range(size):
+        leetcode_user = f"missing{i}" if rng.random() < missing_rate else f"leet{i}"
+        hackerrank_user = f"missing{i}" if rng.random() < missing_rate else f"hack{i}"
+        rows.append({
+            'Roll Number': f"BENCH{i:05d}",
+            'LeetCode profile': f"https://leetcode.com/u/{leetcode_user}/",
+            'Hackerrank profile': f"https://www.hackerrank.com/profile/{hackerrank_user}",
+            'CGPA': round(rng.uniform(5, 10), 2),
+            'Total Backlogs': rng.choice([0, 0, 0, 1, 2]),
+        })
+    return pd.DataFrame(rows)
+
+
+def bench_parser(iterations):
+    from badges import parse_badges_svg
+
+    svg = load_fixture('hackerrank_badges.svg').decode('utf-8')
+    start = time.process_time()
+    for _ in range(iterations):
+        parse_badges_svg(svg)
+    cpu = time.process_time() - start
+    return {'iterations': iterations, 'cpu_seconds': cpu, 'cpu_ms_per_parse': cpu / iterations * 1000}
+
+
+def bench_individual(lookups):
+    """Sequential single-student lookups, as done by the Individual Student view"""
+    from scraper import fetch_hackerrank_badges_svg, fetch_leetcode_stats, fetch_recent_submissions
+
+    latencies = []
+    for i in range(lookups):
+        start = time.perf_counter()
+        fetch_leetcode_stats(f"solo{i}", force_refresh=True)
+        fetch_recent_submissions(f"solo{i}")
+        fetch_hackerrank_badges_svg(f"solo{i}", force_refresh=True)
+        latencies.append(time.perf_counter() - start)
+    return {'lookups': lookups, 'p50': percentile(latencies, 50), 'p95': percentile(latencies, 95)}
+
+
+def bench_enrichment(size, workers, seed, batch=True):
+    import enrichment
+    from schema import HACKERRANK_USERNAME, LEETCODE_USERNAME, normalize_students
+
+    df = normalize_students(synthetic_cohort(size, seed=seed))
+
+    # Time every lookup by wrapping the result builders the engine dispatches to
+    timings = {}
+    timings_lock = threading.Lock()
+
+    def timed(service, func):
+        # A batch lookup counts its full duration against every user in it
+        def run(target, force_refresh=False):
+            start = time.perf_counter()
+            try:
+                return func(target, force_refresh)
+            finally:
+                elapsed = time.perf_counter() - start
+                with timings_lock:
+                    for username in (target if isinstance(target, list) else [target]):
+                        timings[(service, username)] = timings.get((service, username), 0.0) + elapsed
+        return run
+
+    services = tuple(
+        (service, host, column, timed(service, func)) for service, host, column, func in enrichment.SERVICES
+    )
+    batched_services = {
+        service: (host, timed(service, func), batch_size if batch else 0)
+        for service, (host, func, batch_size) in enrichment.BATCHED_SERVICES.items()
+    }
+    parsed_services = {
+        service: (timed(service, download), parse, build, memo)
+        for service, (download, parse, build, memo) in enrichment.PARSED_SERVICES.items()
+    }
+    hosts = [host for _, host, _, _ in services] + [host for host, _, _ in batched_services.values()]
+    start = time.perf_counter()
+    enhanced_df = enrichment.enrich_students(
+        df,
+        host_limits={host: workers for host in hosts},
+        force_refresh=True,
+        services=services,
+        batched_services=batched_services,
+        parsed_services=parsed_services,
+    )
+    wall = time.perf_counter() - start
+
+    per_student = [
+        max(timings.get((enrichment.LEETCODE_SERVICE, lc), 0.0), timings.get((enrichment.HACKERRANK_SERVICE, hr), 0.0))
+        for lc, hr in zip(df[LEETCODE_USERNAME], df[HACKERRANK_USERNAME])
+    ]
+    statuses = {
+        column: {status: count for status, count in enhanced_df[column].value_counts().items() if count}
+        for column in enrichment.STATUS_COLUMNS.values()
+    }
+    return {
+        'students': size,
+        'wall_seconds': wall,
+        'students_per_second': size / wall if wall else 0.0,
+        'p50': percentile(per_student, 50),
+        'p95': percentile(per_student, 95),
+        'statuses': statuses,
+    }
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='python -m bench.run', description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000], help="Cohort sizes to enrich")
+    parser.add_argument('--workers', type=int, default=16, help="Most parallel requests per upstream")
+    parser.add_argument('--latency', type=float, default=0.05, help="Mean upstream latency in seconds")
+    parser.add_argument('--no-jitter', action='store_true', help="Use a fixed latency instead of an exponential one")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Share of requests answered with 500")
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help="Share of requests answered with 429")
+    parser.add_argument('--capacity', type=int, help="Requests each upstream serves at once before answering 429")
+    parser.add_argument('--rate-limit', type=float, default=1000.0, help="Client-side requests/second per upstream")
+    parser.add_argument('--backoff-base', type=float, default=0.05, help="Retry backoff base in seconds")
+    parser.add_argument('--parser-iterations', type=int, default=2000, help="Badge SVG parses to time")
+    parser.add_argument('--individual-lookups', type=int, default=20, help="Single-student lookups to time")
+    parser.add_argument('--no-batch', action='store_true', help="Look LeetCode users up one by one")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', dest='json_path', help="Also write the results to this JSON file")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    # Expected 404s for 'missing' users would otherwise flood the report
+    logging.basicConfig(level=logging.ERROR)
+    options = {
+        'latency': args.latency,
+        'jitter': not args.no_jitter,
+        'error_rate': args.error_rate,
+        'throttle_rate': args.throttle_rate,
+        'capacity': args.capacity,
+        'seed': args.seed,
+    }
+
+    upstreams = UpstreamProcess(**options)
+    with upstreams, tempfile.TemporaryDirectory() as workdir:
+        # Endpoints and cache locations are read when the scraper is imported
+        os.environ['LEETCODE_STATS_URL'] = upstreams.urls['leetcode_stats']
+        os.environ['LEETCODE_GRAPHQL_URL'] = f"{upstreams.urls['leetcode_graphql']}/graphql"
+        os.environ['HACKERRANK_BADGES_URL'] = upstreams.urls['hackerrank_badges']
+        os.environ['SCRAPER_CACHE_PATH'] = os.path.join(workdir, 'cache.sqlite3')
+        os.environ['SCRAPER_BLOB_DIR'] = os.path.join(workdir, 'blobs')
+
+        import http_client
+        from limiter import describe_states
+        from scraper import HACKERRANK_BADGES_HOST, LEETCODE_GRAPHQL_HOST, LEETCODE_STATS_HOST
+
+        http_client.set_client(http_client.HttpClient(
+            rate_limits={
+                host: (args.rate_limit, args.rate_limit)
+                for host in (LEETCODE_STATS_HOST, LEETCODE_GRAPHQL_HOST, HACKERRANK_BADGES_HOST)
+            },
+            backoff_base=args.backoff_base,
+        ))
+
+        results = {'options': vars(args), 'parser': bench_parser(args.parser_iterations)}
+        print(f"Badge parser: {results['parser']['cpu_ms_per_parse']:.3f} ms CPU per parse "
+              f"({args.parser_iterations} parses)")
+
+        results['individual'] = bench_individual(args.individual_lookups)
+        print(f"Individual lookup: p50 {results['individual']['p50'] * 1000:.0f} ms, "
+              f"p95 {results['individual']['p95'] * 1000:.0f} ms")
+
+        results['enrichment'] = []
+        print(f"{'students':>9} {'wall s':>8} {'students/s':>11} {'p50 ms':>8} {'p95 ms':>8}")
+        for size in args.sizes:
+            run = bench_enrichment(size, args.workers, args.seed, batch=not args.no_batch)
+            results['enrichment'].append(run)
+            print(f"{run['students']:>9} {run['wall_seconds']:>8.2f} {run['students_per_second']:>11.1f} "
+                  f"{run['p50'] * 1000:>8.0f} {run['p95'] * 1000:>8.0f}")
+        results['limits'] = http_client.get_client().limiter_states()
+        print(f"Adaptive concurrency: {describe_states(results['limits'])}")
+    results['requests_served'] = upstreams.requests
+    print("Requests served: " + ", ".join(f"{name}={count}" for name, count in upstreams.requests.items()))
+
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump(results, f, indent=2, default=str)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
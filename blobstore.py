@@ -0,0 +1,113 @@
+import hashlib
+import os
+import threading
+import uuid
+from collections import OrderedDict
+
+# Defaults can be overridden per deployment through the environment
+BLOB_DIR = os.environ.get('SCRAPER_BLOB_DIR', '.svg_blobs')
+BLOB_MAX_BYTES = int(os.environ.get('SCRAPER_BLOB_MAX_BYTES', 256 * 1024 * 1024))
+
+
+def content_digest(data):
+    """Hex BLAKE2b digest naming a blob; str is hashed as UTF-8"""
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+class BlobStore:
+    """
+    Content-addressed files under root, each named by the digest of its bytes
+    Identical content is stored once however many users share it. Once the
+    files add up to more than max_bytes, the least recently read or written
+    ones are deleted. Reads touch a file's mtime, so the order survives
+    restarts. Another process sharing root may delete a blob at any time;
+    get() then returns None as for any blob that is gone.
+    """
+
+    def __init__(self, root=BLOB_DIR, max_bytes=BLOB_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+        # digest -> size in bytes, least recently used first
+        self._sizes = OrderedDict()
+        entries = []
+        for entry in os.scandir(root):
+            if entry.is_file() and not entry.name.startswith('.'):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, entry.name, stat.st_size))
+        for _, digest, size in sorted(entries):
+            self._sizes[digest] = size
+        self._total = sum(self._sizes.values())
+
+    def _path(self, digest):
+        return os.path.join(self.root, digest)
+
+    def put(self, data):
+        """Store data (bytes, or str as UTF-8) unless it is already held; returns its digest"""
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        digest = content_digest(data)
+        with self._lock:
+            if digest in self._sizes and os.path.exists(self._path(digest)):
+                self._sizes.move_to_end(digest)
+                os.utime(self._path(digest))
+                return digest
+            # Written under a hidden name so readers never see half a blob
+            temp = os.path.join(self.root, f".{uuid.uuid4().hex}")
+            with open(temp, 'wb') as f:
+                f.write(data)
+            os.replace(temp, self._path(digest))
+            self._total += len(data) - self._sizes.pop(digest, 0)
+            self._sizes[digest] = len(data)
+            self._evict(keep=digest)
+        return digest
+
+    def get(self, digest):
+        """Return the bytes stored under digest, or None when they are not held"""
+        path = self._path(digest)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            with self._lock:
+                self._total -= self._sizes.pop(digest, 0)
+            return None
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+        with self._lock:
+            if digest not in self._sizes:
+                self._sizes[digest] = len(data)
+                self._total += len(data)
+            self._sizes.move_to_end(digest)
+        return data
+
+    def _evict(self, keep):
+        # Called with the lock held
+        while self._total > self.max_bytes and len(self._sizes) > 1:
+            digest, size = next(iter(self._sizes.items()))
+            if digest == keep:
+                break
+            del self._sizes[digest]
+            self._total -= size
+            try:
+                os.remove(self._path(digest))
+            except FileNotFoundError:
+                pass
+
+
+_default_store = None
+_default_store_lock = threading.Lock()
+
+
+def get_blob_store():
+    """Return the process-wide blob store holding downloaded badge SVGs"""
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = BlobStore()
+        return _default_store
@@ -0,0 +1,223 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from metrics import (
+    CACHE_HIT,
+    CACHE_MISS,
+    CACHE_NEGATIVE_HIT,
+    CACHE_REVALIDATED,
+    get_metrics,
+)
+
+# Defaults can be overridden per deployment through the environment
+CACHE_PATH = os.environ.get('SCRAPER_CACHE_PATH', '.scraper_cache.sqlite3')
+CACHE_TTL_SECONDS = int(os.environ.get('SCRAPER_CACHE_TTL', 6 * 60 * 60))
+# Missing users, private profiles and empty badge lists are retried sooner
+CACHE_NEGATIVE_TTL_SECONDS = int(os.environ.get('SCRAPER_CACHE_NEGATIVE_TTL', 60 * 60))
+CACHE_MAX_ENTRIES = int(os.environ.get('SCRAPER_CACHE_MAX_ENTRIES', 20000))
+# Expired and surplus entries are dropped once every this many writes
+EVICT_INTERVAL = 256
+
+# Returned by a fetch function when the upstream answered 304 Not Modified
+NOT_MODIFIED = object()
+
+
+class Fetched:
+    """
+    A fetch function's result for get_or_fetch
+    negative marks a definite miss (unknown user, private profile) that is
+    cached for the shorter negative TTL. etag and last_modified are kept so
+    the entry can be revalidated with a conditional request once it expires.
+    """
+
+    def __init__(self, value, negative=False, etag=None, last_modified=None):
+        self.value = value
+        self.negative = negative
+        self.etag = etag
+        self.last_modified = last_modified
+
+
+class ResponseCache:
+    """
+    On-disk cache of upstream responses keyed by (service, username)
+    Entries older than ttl seconds (negative_ttl for negative entries) are
+    treated as missing. Expired entries that carry an ETag or Last-Modified
+    are kept for revalidation until the least recently used entries are
+    evicted once max_entries is exceeded (checked every EVICT_INTERVAL
+    writes, so the table can briefly hold a few more).
+    Safe to share between threads and between Streamlit sessions.
+    """
+
+    def __init__(self, path=CACHE_PATH, ttl=CACHE_TTL_SECONDS, max_entries=CACHE_MAX_ENTRIES,
+                 negative_ttl=CACHE_NEGATIVE_TTL_SECONDS):
+        self.path = path
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        # A cache can lose its last writes on power loss; skip the fsync per commit
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS responses ('
+            ' service TEXT NOT NULL,'
+            ' key TEXT NOT NULL,'
+            ' value TEXT NOT NULL,'
+            ' fetched_at REAL NOT NULL,'
+            ' accessed_at REAL NOT NULL,'
+            ' negative INTEGER NOT NULL DEFAULT 0,'
+            ' etag TEXT,'
+            ' last_modified TEXT,'
+            ' PRIMARY KEY (service, key))'
+        )
+        # Cache files written before negative entries and validators existed
+        columns = {row[1] for row in self._conn.execute('PRAGMA table_info(responses)')}
+        for column, definition in (
+            ('negative', 'INTEGER NOT NULL DEFAULT 0'),
+            ('etag', 'TEXT'),
+            ('last_modified', 'TEXT'),
+        ):
+            if column not in columns:
+                self._conn.execute(f'ALTER TABLE responses ADD COLUMN {column} {definition}')
+        self._conn.execute('CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed_at)')
+        self._conn.execute('CREATE INDEX IF NOT EXISTS responses_fetched ON responses (fetched_at)')
+        self._conn.commit()
+
+    def _row(self, service, key):
+        # Called with the lock held
+        return self._conn.execute(
+            'SELECT value, fetched_at, negative, etag, last_modified FROM responses'
+            ' WHERE service = ? AND key = ?',
+            (service, key),
+        ).fetchone()
+
+    def _fresh(self, row, now):
+        return now - row[1] <= (self.negative_ttl if row[2] else self.ttl)
+
+    def _touch(self, service, key, now, refetched=False):
+        # Called with the lock held
+        if refetched:
+            self._conn.execute(
+                'UPDATE responses SET accessed_at = ?, fetched_at = ? WHERE service = ? AND key = ?',
+                (now, now, service, key),
+            )
+        else:
+            self._conn.execute(
+                'UPDATE responses SET accessed_at = ? WHERE service = ? AND key = ?',
+                (now, service, key),
+            )
+        self._conn.commit()
+
+    def lookup(self, service, key):
+        """
+        Return (found, value) for an unexpired entry
+        found is False when the entry is missing or expired; a negative
+        entry is found with its stored value (usually None).
+        """
+        now = time.time()
+        with self._lock:
+            row = self._row(service, key)
+            if row is None or not self._fresh(row, now):
+                return False, None
+            self._touch(service, key, now)
+        return True, json.loads(row[0])
+
+    def get(self, service, key):
+        """Return the cached value, or None if missing, expired or negative"""
+        return self.lookup(service, key)[1]
+
+    def set(self, service, key, value, negative=False, etag=None, last_modified=None):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO responses'
+                ' (service, key, value, fetched_at, accessed_at, negative, etag, last_modified)'
+                ' VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (service, key, json.dumps(value), now, now, int(negative), etag, last_modified),
+            )
+            self._writes += 1
+            if self._writes % EVICT_INTERVAL == 0:
+                self._evict()
+            self._conn.commit()
+
+    def get_or_fetch(self, service, key, fetch, force_refresh=False):
+        """
+        Return the cached value for (service, key), calling fetch(validators)
+        when it is missing or expired, or when force_refresh is set
+        validators holds the 'etag' and/or 'last_modified' of a stored
+        positive entry so fetch can send a conditional request. fetch returns
+        NOT_MODIFIED to keep the stored value, a Fetched, a plain value, or
+        None for a transient failure, which is returned but not stored.
+        """
+        now = time.time()
+        with self._lock:
+            row = self._row(service, key)
+            if row is not None and not force_refresh and self._fresh(row, now):
+                self._touch(service, key, now)
+                get_metrics().observe_cache(service, CACHE_NEGATIVE_HIT if row[2] else CACHE_HIT)
+                return json.loads(row[0])
+        get_metrics().observe_cache(service, CACHE_MISS)
+
+        validators = {}
+        if row is not None and not row[2]:
+            if row[3]:
+                validators['etag'] = row[3]
+            if row[4]:
+                validators['last_modified'] = row[4]
+
+        result = fetch(validators)
+        if result is NOT_MODIFIED:
+            with self._lock:
+                self._touch(service, key, time.time(), refetched=True)
+            get_metrics().observe_cache(service, CACHE_REVALIDATED)
+            return json.loads(row[0])
+        if result is None:
+            return None
+        if not isinstance(result, Fetched):
+            result = Fetched(result)
+        self.set(service, key, result.value, result.negative, result.etag, result.last_modified)
+        return result.value
+
+    def delete(self, service, key):
+        with self._lock:
+            self._conn.execute('DELETE FROM responses WHERE service = ? AND key = ?', (service, key))
+            self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute('DELETE FROM responses')
+            self._conn.commit()
+
+    def _evict(self):
+        # Drop expired rows that cannot be revalidated, then the least recently used ones
+        now = time.time()
+        self._conn.execute(
+            'DELETE FROM responses WHERE (negative = 1 AND fetched_at < ?)'
+            ' OR (negative = 0 AND fetched_at < ? AND etag IS NULL AND last_modified IS NULL)',
+            (now - self.negative_ttl, now - self.ttl),
+        )
+        count = self._conn.execute('SELECT COUNT(*) FROM responses').fetchone()[0]
+        if count > self.max_entries:
+            self._conn.execute(
+                'DELETE FROM responses WHERE rowid IN ('
+                ' SELECT rowid FROM responses ORDER BY accessed_at LIMIT ?)',
+                (count - self.max_entries,),
+            )
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """Return the process-wide cache shared by the dashboard and bulk runs"""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = ResponseCache()
+        return _default_cache
@@ -0,0 +1,102 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+JOURNAL_PATH = os.environ.get('BULK_JOURNAL_PATH', '.bulk_checkpoints.sqlite3')
+# Results newer than this are reused instead of being fetched again
+FRESHNESS_SECONDS = int(os.environ.get('BULK_JOURNAL_FRESHNESS', 24 * 60 * 60))
+# Journal entries older than this are deleted when the journal is opened
+RETENTION_SECONDS = int(os.environ.get('BULK_JOURNAL_RETENTION', 7 * 24 * 60 * 60))
+
+# Statuses that do not need to be fetched again on a resumed run
+COMPLETE_STATUSES = frozenset({'Success', 'No URL', 'Invalid URL'})
+
+
+def upload_hash(data):
+    """Identify an uploaded file by the SHA-256 of its bytes"""
+    return hashlib.sha256(data).hexdigest()
+
+
+def uploads_hash(datas):
+    """Identify uploaded files, in order; a single file keeps its upload_hash"""
+    if len(datas) == 1:
+        return upload_hash(datas[0])
+    return upload_hash(''.join(upload_hash(data) for data in datas).encode('ascii'))
+
+
+class RunJournal:
+    """
+    Per-student checkpoint log for bulk enrichment runs
+    Each completed lookup is written as soon as it finishes, keyed by upload
+    hash, roll number and service, so an interrupted run can pick up where
+    it stopped and only refetch failed, stale or missing rows. Students
+    without a roll number are not journaled and are fetched on every run.
+    """
+
+    def __init__(self, path=JOURNAL_PATH, freshness=FRESHNESS_SECONDS, retention=RETENTION_SECONDS):
+        self.path = path
+        self.freshness = freshness
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS results ('
+            ' upload_hash TEXT NOT NULL,'
+            ' roll_number TEXT NOT NULL,'
+            ' service TEXT NOT NULL,'
+            ' status TEXT NOT NULL,'
+            ' value TEXT NOT NULL,'
+            ' completed_at REAL NOT NULL,'
+            ' PRIMARY KEY (upload_hash, roll_number, service))'
+        )
+        self._conn.execute('DELETE FROM results WHERE completed_at < ?', (time.time() - retention,))
+        self._conn.commit()
+
+    def completed(self, upload_hash, freshness=None):
+        """
+        Return {(roll_number, service): values} for lookups of this upload
+        that finished with a complete status inside the freshness window
+        """
+        cutoff = time.time() - (self.freshness if freshness is None else freshness)
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT roll_number, service, status, value FROM results'
+                ' WHERE upload_hash = ? AND completed_at >= ?',
+                (upload_hash, cutoff),
+            ).fetchall()
+        return {
+            (roll_number, service): json.loads(value)
+            for roll_number, service, status, value in rows
+            if status in COMPLETE_STATUSES
+        }
+
+    def record(self, upload_hash, roll_number, service, status, values):
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO results'
+                ' (upload_hash, roll_number, service, status, value, completed_at)'
+                ' VALUES (?, ?, ?, ?, ?, ?)',
+                (upload_hash, roll_number, service, status, json.dumps(values), time.time()),
+            )
+            self._conn.commit()
+
+    def discard(self, upload_hash):
+        with self._lock:
+            self._conn.execute('DELETE FROM results WHERE upload_hash = ?', (upload_hash,))
+            self._conn.commit()
+
+
+_default_journal = None
+_default_journal_lock = threading.Lock()
+
+
+def get_journal():
+    """Return the process-wide journal shared by all bulk runs"""
+    global _default_journal
+    with _default_journal_lock:
+        if _default_journal is None:
+            _default_journal = RunJournal()
+        return _default_journal
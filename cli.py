@@ -0,0 +1,128 @@
+"""
+Headless entry point for bulk enrichment, for cron jobs and worker dynos
+
+    python -m cli enrich 2nd_year.csv 2nd_year.xlsx -o enriched.xlsx --workers 8
+"""
+import argparse
+import logging
+import os
+import sys
+
+from checkpoint import FRESHNESS_SECONDS, get_journal, uploads_hash
+from enrichment import DEFAULT_HOST_LIMITS, STATUS_COLUMNS, enrich_students
+from export import EnrichedExport
+from history import get_history
+from http_client import get_client
+from limiter import describe_states
+from metrics import get_metrics, summary_rows, to_json, to_prometheus
+from schema import read_students
+from scraper import HACKERRANK_BADGES_HOST, LEETCODE_STATS_HOST
+
+logger = logging.getLogger('cli')
+
+# Log progress every this many students
+PROGRESS_INTERVAL = 50
+
+
+def enrich_command(args):
+    datas = []
+    for path in args.input:
+        with open(path, 'rb') as f:
+            datas.append(f.read())
+    file_hash = uploads_hash(datas)
+    df = read_students(*args.input)
+    logger.info("Read %d students from %d file(s)", len(df), len(args.input))
+
+    outputs = {'xlsx_path': None, 'csv_path': args.csv}
+    if args.output.lower().endswith('.csv'):
+        outputs['csv_path'] = args.output
+    else:
+        outputs['xlsx_path'] = args.output
+
+    host_limits = {
+        LEETCODE_STATS_HOST: args.leetcode_workers or args.workers or DEFAULT_HOST_LIMITS[LEETCODE_STATS_HOST],
+        HACKERRANK_BADGES_HOST: args.hackerrank_workers or args.workers or DEFAULT_HOST_LIMITS[HACKERRANK_BADGES_HOST],
+    }
+
+    def report_progress(done, total, roll_number):
+        if done % PROGRESS_INTERVAL == 0 or done == total:
+            logger.info("Processed student %d/%d: %s (%s)", done, total, roll_number,
+                        describe_states(get_client().limiter_states()))
+
+    export = EnrichedExport(df, **outputs)
+    try:
+        enhanced_df = enrich_students(
+            df,
+            host_limits=host_limits,
+            progress_callback=report_progress,
+            force_refresh=args.force_refresh,
+            journal=None if args.no_resume else get_journal(),
+            upload_hash=file_hash,
+            freshness=args.freshness * 3600,
+            row_callback=export.write_row,
+        )
+    finally:
+        export.close()
+
+    for status_column in STATUS_COLUMNS.values():
+        counts = enhanced_df[status_column].cat.rename_categories({'': 'Skipped'}).value_counts()
+        counts = counts[counts > 0]
+        logger.info("%s: %s", status_column, ", ".join(f"{status}={count}" for status, count in counts.items()))
+    for path in (outputs['xlsx_path'], outputs['csv_path']):
+        if path is not None:
+            logger.info("Wrote %s", os.path.abspath(path))
+    if not args.no_history:
+        history = get_history()
+        history.append(enhanced_df, f"cli-{file_hash[:12]}")
+        logger.info("Recorded run in %s", os.path.abspath(history.root))
+
+    snapshot = get_metrics().snapshot()
+    for row in summary_rows(snapshot):
+        logger.info("%s", ", ".join(f"{name}={value:.1f}" if isinstance(value, float) else f"{name}={value}"
+                                     for name, value in row.items()))
+    if args.metrics:
+        with open(args.metrics, 'w') as f:
+            f.write(to_json(snapshot) if args.metrics.lower().endswith('.json') else to_prometheus(snapshot))
+        logger.info("Wrote %s", os.path.abspath(args.metrics))
+    return 0
+
+
+def compact_command(args):
+    history = get_history()
+    history.compact()
+    logger.info("Compacted %s", os.path.abspath(history.root))
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='python -m cli', description=__doc__.strip().splitlines()[0])
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    enrich = subparsers.add_parser('enrich', help="Add LeetCode and HackerRank data to student files")
+    enrich.add_argument('input', nargs='+', help="Student CSV or .xlsx files; a student in several keeps the latest submission")
+    enrich.add_argument('-o', '--output', required=True, help="Output file (.xlsx or .csv)")
+    enrich.add_argument('--csv', help="Also write a CSV copy to this path")
+    enrich.add_argument('--workers', type=int, help="Most parallel requests per upstream service")
+    enrich.add_argument('--leetcode-workers', type=int, help="Most parallel LeetCode requests (overrides --workers)")
+    enrich.add_argument('--hackerrank-workers', type=int, help="Most parallel HackerRank requests (overrides --workers)")
+    enrich.add_argument('--force-refresh', action='store_true', help="Ignore cached responses and checkpoints")
+    enrich.add_argument('--no-resume', action='store_true', help="Do not read or write the checkpoint journal")
+    enrich.add_argument('--freshness', type=float, default=FRESHNESS_SECONDS / 3600,
+                        help="Reuse checkpointed results newer than this many hours")
+    enrich.add_argument('--no-history', action='store_true', help="Do not record this run in the history store")
+    enrich.add_argument('--metrics', help="Write request metrics to this file (.json, otherwise Prometheus text)")
+    enrich.set_defaults(func=enrich_command)
+
+    compact = subparsers.add_parser('compact-history', help="Merge the history store's run files per date")
+    compact.set_defaults(func=compact_command)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,498 @@
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import pandas as pd
+
+from badges import get_badge_memo, parse_badges_timed
+from metrics import get_metrics
+from schema import HACKERRANK_USERNAME, LEETCODE_USERNAME, ROLL_NUMBER, normalize_students, roll_key
+from scraper import (
+    HACKERRANK_BADGES_HOST,
+    LEETCODE_BATCH_SIZE,
+    LEETCODE_GRAPHQL_HOST,
+    LEETCODE_STATS_HOST,
+    fetch_hackerrank_badges_svg,
+    fetch_hackerrank_svg,
+    fetch_leetcode_solved_batch,
+    fetch_leetcode_stats,
+)
+
+logger = logging.getLogger(__name__)
+
+# Most simultaneous requests sent to each upstream service; within these
+# the HTTP client's adaptive limiter finds what each host tolerates
+DEFAULT_HOST_LIMITS = {
+    LEETCODE_STATS_HOST: 16,
+    HACKERRANK_BADGES_HOST: 16,
+    LEETCODE_GRAPHQL_HOST: 4,
+}
+
+ENRICHMENT_COLUMNS = [
+    'LeetCode_Total_Solved',
+    'LeetCode_Easy_Solved',
+    'LeetCode_Medium_Solved',
+    'LeetCode_Hard_Solved',
+    'LeetCode_Status',
+    'HackerRank_Total_Badges',
+    'HackerRank_Total_Stars',
+    'HackerRank_Status',
+]
+
+
+COUNT_COLUMNS = [
+    'LeetCode_Total_Solved',
+    'LeetCode_Easy_Solved',
+    'LeetCode_Medium_Solved',
+    'LeetCode_Hard_Solved',
+    'HackerRank_Total_Badges',
+    'HackerRank_Total_Stars',
+]
+# Nullable so failed lookups stay missing rather than zero
+COUNT_DTYPE = 'Int16'
+
+# Processes parsing badge SVGs during bulk runs, so parsing never holds the
+# GIL the fetch threads need; 0 parses on the fetch threads instead
+PARSE_WORKERS = int(os.environ.get('BULK_PARSE_WORKERS', max(0, (os.cpu_count() or 1) - 1)))
+# Parses handed to the pool per worker before further SVGs wait their turn
+PARSE_QUEUE_PER_WORKER = 4
+
+LEETCODE_SERVICE = 'leetcode'
+HACKERRANK_SERVICE = 'hackerrank'
+
+STATUS_COLUMNS = {
+    LEETCODE_SERVICE: 'LeetCode_Status',
+    HACKERRANK_SERVICE: 'HackerRank_Status',
+}
+# Every status a lookup can end in; '' marks a row the run never reached
+STATUS_DTYPE = pd.CategoricalDtype(['Success', 'Failed', 'Error', 'No URL', 'Invalid URL', 'No Badges Found', ''])
+
+
+def leetcode_values(stats):
+    """LeetCode columns for a successful lookup, from stats API field names"""
+    return {
+        'LeetCode_Total_Solved': stats.get('totalSolved', 0),
+        'LeetCode_Easy_Solved': stats.get('easySolved', 0),
+        'LeetCode_Medium_Solved': stats.get('mediumSolved', 0),
+        'LeetCode_Hard_Solved': stats.get('hardSolved', 0),
+        'LeetCode_Status': 'Success',
+    }
+
+
+def leetcode_result(username, force_refresh=False):
+    """
+    Build the LeetCode columns for one student
+    username is None when there is no LeetCode URL and '' when the URL is unusable
+    Returns a dict of column name -> value
+    """
+    if username is not None and not pd.isna(username):
+        if not username:
+            return {'LeetCode_Status': 'Invalid URL'}
+        try:
+            stats = fetch_leetcode_stats(username, force_refresh=force_refresh)
+            if stats is not None:
+                return leetcode_values(stats)
+            return {'LeetCode_Status': 'Failed'}
+        except:
+            return {'LeetCode_Status': 'Error'}
+    return {'LeetCode_Status': 'No URL'}
+
+
+def leetcode_batch_results(usernames, force_refresh=False):
+    """
+    Build the LeetCode columns for many students with one GraphQL request
+    Returns a dict of username -> column values for the users that were
+    resolved; the rest should be looked up one by one with leetcode_result
+    """
+    try:
+        solved = fetch_leetcode_solved_batch(usernames, force_refresh=force_refresh)
+    except Exception:
+        return {}
+    return {username: leetcode_values(stats) for username, stats in solved.items()}
+
+
+def hackerrank_result(username, force_refresh=False):
+    """
+    Build the HackerRank columns for one student
+    username is None when there is no HackerRank URL and '' when the URL is unusable
+    Returns a dict of column name -> value
+    """
+    if username is not None and not pd.isna(username):
+        if not username:
+            return {'HackerRank_Status': 'Invalid URL'}
+        try:
+            return hackerrank_values(fetch_hackerrank_badges_svg(username, force_refresh=force_refresh))
+        except:
+            return {'HackerRank_Status': 'Error'}
+    return {'HackerRank_Status': 'No URL'}
+
+
+def hackerrank_values(badges):
+    """HackerRank columns for a parsed badge list (None when there were no badges)"""
+    if badges:
+        total_stars = sum(badge['Stars'] for badge in badges if isinstance(badge['Stars'], (int, float)))
+        return {
+            'HackerRank_Total_Badges': len(badges),
+            'HackerRank_Total_Stars': total_stars,
+            'HackerRank_Status': 'Success',
+        }
+    return {'HackerRank_Status': 'No Badges Found'}
+
+
+def hackerrank_download(username, force_refresh=False):
+    """
+    Fetch stage of a HackerRank lookup whose SVG is parsed in the parse pool
+    Returns (values, svg): values when the lookup is finished without
+    parsing (no URL or no SVG), otherwise None and the SVG markup
+    """
+    if username is None or pd.isna(username):
+        return {'HackerRank_Status': 'No URL'}, None
+    if not username:
+        return {'HackerRank_Status': 'Invalid URL'}, None
+    try:
+        svg_xml = fetch_hackerrank_svg(username, force_refresh)
+    except Exception as e:
+        logger.warning("Exception occurred for %s: %s", username, e)
+        svg_xml = None
+    if svg_xml is None:
+        return hackerrank_values(None), None
+    return None, svg_xml
+
+
+# (service, upstream host, username column, result builder) for each lookup
+SERVICES = (
+    (LEETCODE_SERVICE, LEETCODE_STATS_HOST, LEETCODE_USERNAME, leetcode_result),
+    (HACKERRANK_SERVICE, HACKERRANK_BADGES_HOST, HACKERRANK_USERNAME, hackerrank_result),
+)
+
+# Services that can resolve many usernames per request:
+# service -> (upstream host, batch result builder, usernames per batch)
+BATCHED_SERVICES = {
+    LEETCODE_SERVICE: (LEETCODE_GRAPHQL_HOST, leetcode_batch_results, LEETCODE_BATCH_SIZE),
+}
+
+# Services whose responses are parsed in the parse pool: service ->
+# (fetch stage, parser returning (parsed, seconds), result builder, memo of parsed responses)
+PARSED_SERVICES = {
+    HACKERRANK_SERVICE: (hackerrank_download, parse_badges_timed, hackerrank_values, get_badge_memo()),
+}
+
+# What a future in a bulk run produces
+_LOOKUP, _BATCH, _DOWNLOAD, _PARSE = 'lookup', 'batch', 'download', 'parse'
+
+_parse_pool = None
+_parse_pool_lock = threading.Lock()
+
+
+def get_parse_pool():
+    """Return the process-wide SVG parse pool, or None if PARSE_WORKERS is 0"""
+    global _parse_pool
+    with _parse_pool_lock:
+        if _parse_pool is None and PARSE_WORKERS > 0:
+            # Forking the threaded Streamlit server could copy locks held by other threads
+            _parse_pool = ProcessPoolExecutor(PARSE_WORKERS, mp_context=multiprocessing.get_context('spawn'))
+        return _parse_pool
+
+
+def _discard_parse_pool(pool):
+    # A worker died; the next run starts a fresh pool
+    global _parse_pool
+    with _parse_pool_lock:
+        if _parse_pool is pool:
+            _parse_pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _parse_inline(parse, raw):
+    try:
+        return parse(raw)
+    except Exception as e:
+        logger.warning("Could not parse response: %s", e)
+        return None, 0.0
+
+
+class _BulkRun:
+    """
+    State of one enrich_students call
+    results[position] collects a student's enrichment values and pending
+    counts the lookups it still waits for. waiting maps each (service,
+    username) to the positions sharing that lookup, so it is fetched once.
+    """
+
+    def __init__(self, df, services, batched_services, parsed_services, force_refresh,
+                 progress_callback, row_callback, journal, upload_hash):
+        self.df = df
+        self.services = services
+        self.batched_services = batched_services
+        self.parsed_services = parsed_services
+        self.force_refresh = force_refresh
+        self.progress_callback = progress_callback
+        self.row_callback = row_callback
+        self.journal = journal if upload_hash is not None else None
+        self.upload_hash = upload_hash
+
+        self.roll_numbers = df[ROLL_NUMBER].tolist()
+        self.roll_keys = [roll_key(roll_number) for roll_number in self.roll_numbers]
+        self.total = len(df)
+        self.results = [{} for _ in range(self.total)]
+        self.pending = [0] * self.total
+        self.done = 0
+        # (position, service) lookups restored from the journal
+        self.restored = set()
+        # (service, username) -> positions waiting on that lookup
+        self.waiting = {}
+        # service -> usernames waiting for their batch to fill
+        self.batches = {}
+
+        self.executors = {}
+        # future -> (service, username or batch of usernames, what it produces)
+        self.futures = {}
+        # Futures land here as they finish, in completion order
+        self.finished = queue.Queue()
+        self.parse_pool = get_parse_pool() if parsed_services else None
+        # (service, username, raw response) waiting for a parse slot
+        self.parse_queue = deque()
+        # parse future -> raw response, kept to parse inline if the pool breaks
+        self.parsing = {}
+
+    def run(self, limits, completed):
+        """Fetch every lookup not in completed and return the per-row result dicts"""
+        self.restore(completed)
+        # A queued request waits for its own host's pool rather than holding
+        # a worker another host could use
+        self.executors = {
+            host: ThreadPoolExecutor(max_workers=max(1, int(n)), thread_name_prefix='enrich')
+            for host, n in limits.items()
+        }
+        try:
+            self.dispatch()
+            self.collect()
+        except BaseException:
+            # Nothing will read the queued requests, so a failed run does not wait for them
+            for executor in self.executors.values():
+                executor.shutdown(wait=False, cancel_futures=True)
+            raise
+        for executor in self.executors.values():
+            executor.shutdown()
+        return self.results
+
+    def restore(self, completed):
+        """Take the values of lookups the journal holds for rows with a roll number"""
+        if not completed:
+            return
+        for position, key in enumerate(self.roll_keys):
+            if key is None:
+                continue
+            for service, _, _, _ in self.services:
+                values = completed.get((key, service))
+                if values is not None:
+                    self.results[position].update(values)
+                    self.restored.add((position, service))
+
+    def dispatch(self):
+        """Queue a lookup per distinct (service, username) and finish the rows that need none"""
+        for position in range(self.total):
+            for service, host, username_column, func in self.services:
+                if (position, service) in self.restored:
+                    continue
+                self.pending[position] += 1
+                username = self.df[username_column].iat[position]
+                if pd.isna(username):
+                    username = None
+                positions = self.waiting.get((service, username))
+                if positions is not None:
+                    positions.append(position)
+                    continue
+                self.waiting[(service, username)] = [position]
+                if username and service in self.batched_services and self.batched_services[service][2] > 1:
+                    # Sent as soon as it is full, so LeetCode starts alongside HackerRank
+                    batch = self.batches.setdefault(service, [])
+                    batch.append(username)
+                    if len(batch) >= self.batched_services[service][2]:
+                        self.submit_batch(service)
+                elif self.parse_pool is not None and service in self.parsed_services:
+                    download = self.parsed_services[service][0]
+                    self.track(self.submit(host, download, username), service, username, _DOWNLOAD)
+                else:
+                    self.track(self.submit(host, func, username), service, username, _LOOKUP)
+            if self.pending[position] == 0:
+                self.finish(position)
+
+        for service in list(self.batches):
+            self.submit_batch(service)
+
+        if self.done and self.progress_callback is not None:
+            self.progress_callback(self.done, self.total, 'restored from checkpoint')
+
+    def submit(self, host, func, target):
+        return self.executors[host].submit(func, target, self.force_refresh)
+
+    def submit_batch(self, service):
+        batch_host, batch_func, _ = self.batched_services[service]
+        batch = self.batches.pop(service)
+        self.track(self.submit(batch_host, batch_func, batch), service, batch, _BATCH)
+
+    def track(self, future, service, target, kind):
+        self.futures[future] = (service, target, kind)
+        future.add_done_callback(self.finished.put)
+
+    def collect(self):
+        """Handle futures in completion order until every lookup is delivered"""
+        lookups = {service: (host, func) for service, host, _, func in self.services}
+        while self.futures:
+            future = self.finished.get()
+            service, target, kind = self.futures.pop(future)
+            if kind == _LOOKUP:
+                self.deliver(service, target, future.result())
+
+            elif kind == _BATCH:
+                resolved = future.result()
+                host, func = lookups[service]
+                for username in target:
+                    if username in resolved:
+                        self.deliver(service, username, resolved[username])
+                    else:
+                        self.track(self.submit(host, func, username), service, username, _LOOKUP)
+
+            elif kind == _DOWNLOAD:
+                values, raw = future.result()
+                if values is None:
+                    _, _, build, memo = self.parsed_services[service]
+                    found, parsed = memo.get(raw)
+                    if found:
+                        values = build(parsed)
+                    else:
+                        self.parse_queue.append((service, target, raw))
+                if values is not None:
+                    self.deliver(service, target, values)
+
+            else:
+                raw = self.parsing.pop(future)
+                _, parse, build, memo = self.parsed_services[service]
+                try:
+                    parsed, seconds = future.result()
+                except BrokenProcessPool:
+                    if self.parse_pool is not None:
+                        _discard_parse_pool(self.parse_pool)
+                        self.parse_pool = None
+                    parsed, seconds = _parse_inline(parse, raw)
+                except Exception as e:
+                    logger.warning("Could not parse response for %s: %s", target, e)
+                    parsed, seconds = None, 0.0
+                get_metrics().observe_parse(seconds)
+                memo.put(raw, parsed)
+                self.deliver(service, target, build(parsed))
+            self.start_parses()
+
+    def start_parses(self):
+        while self.parse_queue and len(self.parsing) < PARSE_WORKERS * PARSE_QUEUE_PER_WORKER:
+            service, username, raw = self.parse_queue.popleft()
+            _, parse, build, memo = self.parsed_services[service]
+            if self.parse_pool is not None:
+                try:
+                    future = self.parse_pool.submit(parse, raw)
+                except (BrokenProcessPool, RuntimeError):
+                    _discard_parse_pool(self.parse_pool)
+                    self.parse_pool = None
+                else:
+                    self.parsing[future] = raw
+                    self.track(future, service, username, _PARSE)
+                    continue
+            parsed, seconds = _parse_inline(parse, raw)
+            get_metrics().observe_parse(seconds)
+            memo.put(raw, parsed)
+            self.deliver(service, username, build(parsed))
+
+    def deliver(self, service, username, values):
+        for position in self.waiting[(service, username)]:
+            self.results[position].update(values)
+            self.checkpoint(position, service, values)
+            self.pending[position] -= 1
+            if self.pending[position] == 0:
+                self.finish(position)
+                if self.progress_callback is not None:
+                    self.progress_callback(self.done, self.total, self.roll_numbers[position])
+
+    def checkpoint(self, position, service, values):
+        # Rows without a roll number cannot be told apart on a resumed run,
+        # so they are fetched again rather than sharing one journal entry
+        key = self.roll_keys[position]
+        if self.journal is not None and key is not None:
+            self.journal.record(self.upload_hash, key, service, values.get(STATUS_COLUMNS[service], ''), values)
+
+    def finish(self, position):
+        self.done += 1
+        if self.row_callback is not None:
+            self.row_callback(position, self.results[position])
+
+
+def enrich_students(df, host_limits=None, progress_callback=None, force_refresh=False,
+                    journal=None, upload_hash=None, freshness=None, row_callback=None,
+                    services=None, batched_services=None, parsed_services=None):
+    """
+    Fetch LeetCode and HackerRank data for every student concurrently
+    Each upstream host gets its own thread pool sized to its cap on
+    simultaneous requests, so a slow service never starves the other one.
+    Students sharing a username are looked up once and all get that result.
+    LeetCode users are resolved in batches through GraphQL, falling back to
+    the per-user stats API for any the batch could not resolve. Badge SVGs
+    downloaded by the fetch threads are parsed in a process pool, and the
+    calling thread assembles the rows. progress_callback(done, total, roll)
+    is called from the calling thread each time a student is complete, and
+    row_callback(position, values) receives that student's enrichment values.
+    Cached upstream responses are reused unless force_refresh is set.
+    With a journal and upload_hash every finished lookup is checkpointed, and
+    lookups that already succeeded within the freshness window are reused.
+    services, batched_services and parsed_services replace the SERVICES,
+    BATCHED_SERVICES and PARSED_SERVICES tables, e.g. to time each lookup.
+    Returns a copy of df with typed enrichment columns appended
+    """
+    limits = dict(DEFAULT_HOST_LIMITS)
+    limits.update(host_limits or {})
+    completed = {}
+    if journal is not None and upload_hash is not None and not force_refresh:
+        completed = journal.completed(upload_hash, freshness)
+
+    run = _BulkRun(df,
+                   SERVICES if services is None else services,
+                   BATCHED_SERVICES if batched_services is None else batched_services,
+                   PARSED_SERVICES if parsed_services is None else parsed_services,
+                   force_refresh, progress_callback, row_callback, journal, upload_hash)
+    return with_enrichment_columns(df, run.run(limits, completed))
+
+
+def with_enrichment_columns(df, results):
+    """
+    Append the enrichment columns built from per-row result dicts to df
+    """
+    enrichment = pd.DataFrame.from_records(results, columns=ENRICHMENT_COLUMNS)
+    enrichment.index = df.index
+    return pd.concat([df.drop(columns=ENRICHMENT_COLUMNS, errors='ignore'), typed_enrichment(enrichment)], axis=1)
+
+
+def typed_enrichment(enrichment):
+    """
+    Apply the enrichment column types to a frame holding those columns
+    Solved counts, badges and stars become COUNT_DTYPE and statuses
+    STATUS_DTYPE categories, with unfinished rows as ''
+    """
+    enrichment = enrichment.copy()
+    for col in COUNT_COLUMNS:
+        enrichment[col] = pd.to_numeric(enrichment[col], errors='coerce').astype(COUNT_DTYPE)
+    for col in STATUS_COLUMNS.values():
+        enrichment[col] = enrichment[col].fillna('').astype(STATUS_DTYPE)
+    return enrichment
+
+
+def read_enriched(source):
+    """
+    Read an enriched CSV export back with the same types enrich_students produced
+    """
+    raw = pd.read_csv(source, dtype='string')
+    students = normalize_students(raw.drop(columns=ENRICHMENT_COLUMNS, errors='ignore'))
+    return pd.concat([students, typed_enrichment(raw.reindex(columns=ENRICHMENT_COLUMNS))], axis=1)
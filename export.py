@@ -0,0 +1,74 @@
+import csv
+
+import pandas as pd
+import xlsxwriter
+
+from enrichment import ENRICHMENT_COLUMNS
+from schema import DERIVED_COLUMNS
+
+SHEET_NAME = 'Student_Data'
+
+
+def _cell(value):
+    # Missing values become empty cells, like DataFrame.to_excel / to_csv
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return None
+    return value
+
+
+class EnrichedExport:
+    """
+    Streams enriched student rows to an Excel and/or a CSV file as they complete
+    Rows can arrive in any order; each is written as soon as every row
+    before it has been written, so only out-of-order rows are held in
+    memory. The workbook uses xlsxwriter's constant_memory mode.
+    """
+
+    def __init__(self, df, xlsx_path=None, csv_path=None):
+        self.base_df = df.drop(columns=ENRICHMENT_COLUMNS + DERIVED_COLUMNS, errors='ignore')
+        self.columns = list(self.base_df.columns) + ENRICHMENT_COLUMNS
+        self.xlsx_path = xlsx_path
+        self.csv_path = csv_path
+
+        self._workbook = self._worksheet = None
+        if xlsx_path is not None:
+            self._workbook = xlsxwriter.Workbook(xlsx_path, {
+                'constant_memory': True,
+                'strings_to_urls': False,
+                'strings_to_formulas': False,
+                # Completion times are written as dates rather than bare serial numbers
+                'default_date_format': 'yyyy-mm-dd hh:mm:ss',
+            })
+            self._worksheet = self._workbook.add_worksheet(SHEET_NAME)
+            header_format = self._workbook.add_format({'bold': True, 'border': 1, 'align': 'center', 'valign': 'top'})
+            self._worksheet.write_row(0, 0, self.columns, header_format)
+
+        self._csv_file = self._csv = None
+        if csv_path is not None:
+            self._csv_file = open(csv_path, 'w', newline='', encoding='utf-8')
+            self._csv = csv.writer(self._csv_file)
+            self._csv.writerow(self.columns)
+
+        self._next_position = 0
+        self._buffer = {}
+
+    def write_row(self, position, values):
+        """Queue the row at position with its enrichment values, flushing what is now in order"""
+        self._buffer[position] = values
+        while self._next_position in self._buffer:
+            values = self._buffer.pop(self._next_position)
+            row = self.base_df.iloc[self._next_position].tolist() + [values.get(col) for col in ENRICHMENT_COLUMNS]
+            row = [_cell(value) for value in row]
+            if self._worksheet is not None:
+                for col, value in enumerate(row):
+                    if value is not None:
+                        self._worksheet.write(self._next_position + 1, col, value)
+            if self._csv is not None:
+                self._csv.writerow(['' if value is None else value for value in row])
+            self._next_position += 1
+
+    def close(self):
+        if self._workbook is not None:
+            self._workbook.close()
+        if self._csv_file is not None:
+            self._csv_file.close()
@@ -0,0 +1,168 @@
+import os
+import threading
+import time
+import uuid
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.fs
+import pyarrow.parquet as pq
+
+from enrichment import COUNT_COLUMNS, STATUS_COLUMNS
+from schema import CGPA, ROLL_NUMBER, SECTION, TOTAL_BACKLOGS, roll_key
+
+HISTORY_DIR = os.environ.get('SCRAPER_HISTORY_DIR', '.history')
+# A run-date partition is merged into one file once it holds this many run files
+COMPACT_THRESHOLD = int(os.environ.get('SCRAPER_HISTORY_COMPACT_THRESHOLD', 8))
+
+RUN_ID = 'Run ID'
+TAKEN_AT = 'Taken At'
+RUN_DATE = 'run_date'
+
+SNAPSHOT_SCHEMA = pa.schema(
+    [
+        (ROLL_NUMBER, pa.string()),
+        (SECTION, pa.string()),
+        (CGPA, pa.float64()),
+        (TOTAL_BACKLOGS, pa.float32()),
+    ]
+    + [(col, pa.int32()) for col in COUNT_COLUMNS]
+    + [(col, pa.string()) for col in STATUS_COLUMNS.values()]
+    + [(RUN_ID, pa.string()), (TAKEN_AT, pa.timestamp('ms', tz='UTC'))]
+)
+PARTITIONING = ds.partitioning(pa.schema([(RUN_DATE, pa.string())]), flavor='hive')
+
+
+class SnapshotStore:
+    """
+    Append-only Parquet history of enrichment results
+    Every run is written as one file under run_date=YYYY-MM-DD/, with roll
+    numbers normalized and rows sorted by them so reads for one student skip
+    most row groups; students without a roll number are not recorded. Files
+    are memory-mapped when read. Once a date holds compact_threshold run
+    files they are merged into one, which only ever rewrites that day's rows.
+    """
+
+    def __init__(self, root=HISTORY_DIR, compact_threshold=COMPACT_THRESHOLD):
+        self.root = root
+        self.compact_threshold = compact_threshold
+        self._lock = threading.Lock()
+        self._filesystem = pyarrow.fs.LocalFileSystem(use_mmap=True)
+        os.makedirs(root, exist_ok=True)
+
+    def append(self, df, run_id, taken_at=None):
+        """Record the enrichment columns of df as one run taken at taken_at (epoch seconds, default now)"""
+        taken_at = pd.Timestamp(taken_at or time.time(), unit='s', tz='UTC').floor('ms')
+        snapshot = pd.DataFrame({
+            ROLL_NUMBER: df[ROLL_NUMBER].map(roll_key),
+            SECTION: df[SECTION].astype('string') if SECTION in df.columns else None,
+            CGPA: df[CGPA],
+            TOTAL_BACKLOGS: df[TOTAL_BACKLOGS],
+        })
+        for col in COUNT_COLUMNS:
+            snapshot[col] = df[col]
+        for col in STATUS_COLUMNS.values():
+            snapshot[col] = df[col].astype('string')
+        snapshot[RUN_ID] = str(run_id)
+        snapshot[TAKEN_AT] = taken_at
+        # Rows without a roll number would all merge into one student
+        snapshot = snapshot.dropna(subset=[ROLL_NUMBER]).drop_duplicates(ROLL_NUMBER).sort_values(ROLL_NUMBER)
+        table = pa.Table.from_pandas(snapshot, schema=SNAPSHOT_SCHEMA, preserve_index=False)
+
+        partition = self._partition(taken_at.strftime('%Y-%m-%d'))
+        with self._lock:
+            os.makedirs(partition, exist_ok=True)
+            # Written under a hidden name so readers never see half a file
+            name = f"{uuid.uuid4().hex}.parquet"
+            pq.write_table(table, os.path.join(partition, f".{name}"))
+            os.replace(os.path.join(partition, f".{name}"), os.path.join(partition, name))
+            if len(self._files(partition)) >= self.compact_threshold:
+                self._compact(partition)
+
+    def _partition(self, run_date):
+        return os.path.join(self.root, f"{RUN_DATE}={run_date}")
+
+    @staticmethod
+    def _files(partition):
+        return sorted(
+            os.path.join(partition, name) for name in os.listdir(partition)
+            if name.endswith('.parquet') and not name.startswith('.')
+        )
+
+    def _compact(self, partition):
+        # Called with the lock held. The merged file replaces the run files
+        # in one rename per file, so a reader racing this may miss the
+        # partition's rows for a moment but never sees them twice.
+        files = self._files(partition)
+        merged = pa.concat_tables(pq.read_table(path, schema=SNAPSHOT_SCHEMA) for path in files)
+        merged = merged.sort_by([(ROLL_NUMBER, 'ascending'), (TAKEN_AT, 'ascending')])
+        name = f"{uuid.uuid4().hex}.parquet"
+        pq.write_table(merged, os.path.join(partition, f".{name}"))
+        for path in files:
+            os.remove(path)
+        os.replace(os.path.join(partition, f".{name}"), os.path.join(partition, name))
+
+    def compact(self):
+        """Merge the run files of every date that has more than one"""
+        with self._lock:
+            for name in os.listdir(self.root):
+                partition = os.path.join(self.root, name)
+                if name.startswith(f"{RUN_DATE}=") and len(self._files(partition)) > 1:
+                    self._compact(partition)
+
+    def read(self, columns=None, filter=None):
+        """All snapshots matching filter (a pyarrow.dataset expression), oldest first"""
+        dataset = ds.dataset(self.root, schema=SNAPSHOT_SCHEMA, format='parquet',
+                             partitioning=PARTITIONING, filesystem=self._filesystem)
+        table = dataset.to_table(columns=columns, filter=filter)
+        return table.to_pandas().sort_values(TAKEN_AT, kind='stable').reset_index(drop=True)
+
+    def student_history(self, roll_number):
+        """Every recorded snapshot of one student, oldest first"""
+        key = roll_key(roll_number)
+        return self.read(filter=ds.field(ROLL_NUMBER) == key if key is not None else ds.scalar(False))
+
+    def deltas(self, since, roll_numbers=None):
+        """
+        Change in every count column per student between their latest values
+        taken at or before since (a datetime or timestamp) and their latest
+        values overall
+        Only counts that were fetched successfully are compared, so a failed
+        lookup in the newest run falls back to the run before it. Students
+        with no snapshot at or before since are compared against their first.
+        Returns a frame indexed by roll number with <column>_Before,
+        <column>_Now and <column>_Change columns.
+        """
+        filter = None
+        if roll_numbers is not None:
+            keys = (roll_key(roll_number) for roll_number in roll_numbers)
+            filter = ds.field(ROLL_NUMBER).isin([key for key in keys if key is not None])
+        snapshots = self.read(columns=[ROLL_NUMBER, SECTION, TAKEN_AT] + COUNT_COLUMNS, filter=filter)
+        # groupby last/first skip missing values column by column
+        grouped = snapshots.groupby(ROLL_NUMBER)
+        latest = grouped[COUNT_COLUMNS].last()
+        cutoff = pd.Timestamp(since)
+        cutoff = cutoff.tz_localize('UTC') if cutoff.tzinfo is None else cutoff
+        before = snapshots[snapshots[TAKEN_AT] <= cutoff].groupby(ROLL_NUMBER)[COUNT_COLUMNS].last()
+        before = before.reindex(latest.index).combine_first(grouped[COUNT_COLUMNS].first())
+
+        result = grouped[[SECTION]].last()
+        for col in COUNT_COLUMNS:
+            result[f'{col}_Before'] = before[col]
+            result[f'{col}_Now'] = latest[col]
+            result[f'{col}_Change'] = latest[col] - before[col]
+        return result
+
+
+_default_store = None
+_default_store_lock = threading.Lock()
+
+
+def get_history():
+    """Return the process-wide snapshot store bulk runs append to"""
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = SnapshotStore()
+        return _default_store
@@ -0,0 +1,209 @@
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from limiter import MAX_LIMIT, AdaptiveLimiter
+from metrics import CONNECTION_ERROR, REQUEST_ERROR, TIMEOUT, get_metrics
+
+# Statuses that usually clear up on their own and are worth retrying
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+# Statuses that tell the adaptive limiter the host is overloaded
+OVERLOAD_STATUSES = frozenset({429}) | frozenset(range(500, 600))
+RETRY_EXCEPTIONS = (requests.exceptions.ConnectionError, requests.exceptions.Timeout)
+
+MAX_RETRIES = 3
+BACKOFF_BASE_SECONDS = 0.5
+BACKOFF_MAX_SECONDS = 8.0
+
+# Connections kept alive per host; matches the highest adaptive limit
+POOL_SIZE = MAX_LIMIT
+
+# Sustained requests per second and burst size allowed for each upstream host
+DEFAULT_RATE_LIMITS = {
+    'leetcode-stats-api.herokuapp.com': (10.0, 10),
+    'hackerrank-badges.vercel.app': (10.0, 10),
+    'leetcode.com': (2.0, 4),
+}
+FALLBACK_RATE_LIMIT = (5.0, 5)
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket
+    Tokens refill continuously at rate per second up to capacity, and
+    acquire() blocks until one is available, returning the seconds it waited.
+    """
+
+    def __init__(self, rate, capacity):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+            waited += wait
+
+
+def retry_after_seconds(response):
+    """Seconds a Retry-After header (delta or HTTP date) asks to wait, or None"""
+    value = response.headers.get('Retry-After')
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+class HttpClient:
+    """
+    Shared HTTP client for all upstream calls
+    Keeps one pooled keep-alive Session per host, rate-limits each host with
+    a token bucket, caps its requests in flight with an AdaptiveLimiter fed
+    by every response, and retries timeouts, connection errors and transient
+    statuses with exponential backoff and full jitter, waiting out any
+    Retry-After. When retries run out the last response is returned, or the
+    last exception re-raised. Every attempt, retry and wait on the rate or
+    concurrency limiter is reported to metrics.
+    """
+
+    def __init__(self, rate_limits=None, max_retries=MAX_RETRIES,
+                 backoff_base=BACKOFF_BASE_SECONDS, backoff_max=BACKOFF_MAX_SECONDS,
+                 pool_size=POOL_SIZE, metrics=None):
+        self.rate_limits = dict(DEFAULT_RATE_LIMITS)
+        self.rate_limits.update(rate_limits or {})
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.pool_size = pool_size
+        self.metrics = metrics or get_metrics()
+        self._sessions = {}
+        self._buckets = {}
+        self._limiters = {}
+        self._lock = threading.Lock()
+
+    def session(self, host):
+        with self._lock:
+            session = self._sessions.get(host)
+            if session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                self._sessions[host] = session
+            return session
+
+    def bucket(self, host):
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                bucket = TokenBucket(*self.rate_limits.get(host, FALLBACK_RATE_LIMIT))
+                self._buckets[host] = bucket
+            return bucket
+
+    def limiter(self, host):
+        with self._lock:
+            limiter = self._limiters.get(host)
+            if limiter is None:
+                limiter = AdaptiveLimiter()
+                self._limiters[host] = limiter
+            return limiter
+
+    def limiter_states(self):
+        """Current adaptive limit, requests in flight and latency per host"""
+        with self._lock:
+            limiters = dict(self._limiters)
+        return {host: limiter.state() for host, limiter in limiters.items()}
+
+    def backoff(self, attempt):
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def request(self, method, url, timeout=None, **kwargs):
+        host = urlsplit(url).netloc
+        session = self.session(host)
+        bucket = self.bucket(host)
+        limiter = self.limiter(host)
+
+        for attempt in range(self.max_retries + 1):
+            waited = limiter.acquire() + bucket.acquire()
+            if waited:
+                self.metrics.observe_rate_limit_wait(host, waited)
+
+            start = time.perf_counter()
+            try:
+                response = session.request(method, url, timeout=limiter.timeout(timeout), **kwargs)
+            except RETRY_EXCEPTIONS as e:
+                elapsed = time.perf_counter() - start
+                timed_out = isinstance(e, requests.exceptions.Timeout)
+                limiter.release(elapsed, overloaded=True, timed_out=timed_out)
+                self.metrics.observe_request(host, TIMEOUT if timed_out else CONNECTION_ERROR, elapsed)
+                if attempt == self.max_retries:
+                    raise
+            except requests.exceptions.RequestException:
+                elapsed = time.perf_counter() - start
+                limiter.release(elapsed)
+                self.metrics.observe_request(host, REQUEST_ERROR, elapsed)
+                raise
+            except BaseException:
+                limiter.release(time.perf_counter() - start)
+                raise
+            else:
+                elapsed = time.perf_counter() - start
+                limiter.release(elapsed, overloaded=response.status_code in OVERLOAD_STATUSES,
+                                retry_after=retry_after_seconds(response))
+                self.metrics.observe_request(host, response.status_code, elapsed)
+                if response.status_code not in RETRY_STATUSES or attempt == self.max_retries:
+                    return response
+                response.close()
+
+            delay = self.backoff(attempt)
+            self.metrics.observe_retry(host, delay)
+            time.sleep(delay)
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+
+_default_client = None
+_default_client_lock = threading.Lock()
+
+
+def set_client(client):
+    """Replace the process-wide client, e.g. with different rate limits"""
+    global _default_client
+    with _default_client_lock:
+        _default_client = client
+
+
+def get_client():
+    """Return the process-wide client shared by the dashboard and bulk runs"""
+    global _default_client
+    with _default_client_lock:
+        if _default_client is None:
+            _default_client = HttpClient()
+        return _default_client
@@ -0,0 +1,207 @@
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from enrichment import enrich_students, read_enriched
+from export import EnrichedExport
+from history import get_history
+from metrics import get_metrics, subtract_snapshots
+
+logger = logging.getLogger(__name__)
+
+RESULTS_DIR = os.environ.get('BULK_RESULTS_DIR', '.bulk_results')
+# Bulk exports allowed to run at the same time; later ones wait in a queue
+JOB_WORKERS = int(os.environ.get('BULK_JOB_WORKERS', 2))
+# Finished exports older than this are deleted from the result store
+RESULTS_RETENTION_SECONDS = int(os.environ.get('BULK_RESULTS_RETENTION', 24 * 60 * 60))
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+
+class BulkJob:
+    """
+    State of one bulk export, updated by the worker and read by the UI
+    done/total and current (the last finished roll number) track progress;
+    xlsx_path and csv_path point into the result store once status is DONE.
+    The enriched frame itself is not kept; result_frame() reads it back.
+    """
+
+    def __init__(self, job_id, upload_hash, total, submitted_at=None):
+        self.id = job_id
+        self.upload_hash = upload_hash
+        self.total = total
+        self.done = 0
+        self.current = ''
+        self.status = QUEUED
+        self.error = None
+        self.submitted_at = submitted_at or time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.xlsx_path = None
+        self.csv_path = None
+        self.metrics = None
+
+    @property
+    def finished(self):
+        return self.status in (DONE, FAILED)
+
+    def result_frame(self):
+        """The enriched frame, read from the CSV export, or None before the job is done"""
+        return read_enriched(self.csv_path) if self.csv_path is not None else None
+
+    def to_dict(self):
+        return {
+            name: getattr(self, name)
+            for name in ('id', 'upload_hash', 'total', 'done', 'status', 'error', 'submitted_at',
+                         'started_at', 'finished_at', 'xlsx_path', 'csv_path', 'metrics')
+        }
+
+    @classmethod
+    def from_dict(cls, values):
+        job = cls(values['id'], values['upload_hash'], values['total'], values['submitted_at'])
+        for name, value in values.items():
+            setattr(job, name, value)
+        return job
+
+
+class JobRunner:
+    """
+    Runs bulk enrichment and export jobs on a worker pool outside the
+    Streamlit script thread, so they survive reruns and browser refreshes
+    Jobs are identified by ID. Submitting an upload that already has a
+    queued or running job with the same options attaches to that job
+    instead of starting another. Finished Excel/CSV files and job metadata
+    are kept in result_dir for retention seconds.
+    """
+
+    def __init__(self, result_dir=RESULTS_DIR, max_workers=JOB_WORKERS, retention=RESULTS_RETENTION_SECONDS):
+        self.result_dir = result_dir
+        self.retention = retention
+        os.makedirs(result_dir, exist_ok=True)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='bulk-job')
+        self._jobs = {}
+        self._active = {}
+        self._lock = threading.Lock()
+
+    def submit(self, df, upload_hash, host_limits=None, force_refresh=False, journal=None, freshness=None):
+        """
+        Queue enrichment of df, or attach to the identical job already in flight
+        Returns (job, created), where created is False when attaching.
+        """
+        key = (upload_hash, force_refresh, freshness)
+        with self._lock:
+            job = self._active.get(key)
+            if job is not None and not job.finished:
+                return job, False
+            self._prune()
+            job = BulkJob(uuid.uuid4().hex[:12], upload_hash, len(df))
+            self._jobs[job.id] = job
+            self._active[key] = job
+
+        self._executor.submit(self._run, job, df, host_limits, force_refresh, journal, freshness)
+        return job, True
+
+    def get(self, job_id):
+        """Return the job with this ID, from memory or the result store, or None"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                return job
+        try:
+            with open(self._path(job_id, 'json')) as f:
+                job = BulkJob.from_dict(json.load(f))
+        except (OSError, ValueError, KeyError):
+            return None
+        with self._lock:
+            return self._jobs.setdefault(job_id, job)
+
+    def _path(self, job_id, extension):
+        # IDs come from the URL, so only ever use their hex characters
+        safe_id = ''.join(c for c in str(job_id) if c in '0123456789abcdef')
+        return os.path.join(self.result_dir, f"{safe_id}.{extension}")
+
+    def _run(self, job, df, host_limits, force_refresh, journal, freshness):
+        job.status = RUNNING
+        job.started_at = time.time()
+
+        def report_progress(done, total, roll_number):
+            job.done = done
+            job.current = str(roll_number)
+
+        metrics_before = get_metrics().snapshot()
+        try:
+            export = EnrichedExport(df, xlsx_path=self._path(job.id, 'xlsx'), csv_path=self._path(job.id, 'csv'))
+            try:
+                result = enrich_students(
+                    df,
+                    host_limits=host_limits,
+                    progress_callback=report_progress,
+                    force_refresh=force_refresh,
+                    journal=journal,
+                    upload_hash=job.upload_hash,
+                    freshness=freshness,
+                    row_callback=export.write_row,
+                )
+            finally:
+                export.close()
+            job.xlsx_path = export.xlsx_path
+            job.csv_path = export.csv_path
+            job.status = DONE
+            try:
+                get_history().append(result, job.id)
+            except Exception:
+                logger.exception("Could not record bulk job %s in the history store", job.id)
+        except Exception as e:
+            logger.exception("Bulk job %s failed", job.id)
+            job.error = str(e)
+            job.status = FAILED
+        finally:
+            job.metrics = subtract_snapshots(get_metrics().snapshot(), metrics_before)
+            job.finished_at = time.time()
+            self._save(job)
+
+    def _save(self, job):
+        try:
+            with open(self._path(job.id, 'json'), 'w') as f:
+                json.dump(job.to_dict(), f)
+        except OSError:
+            logger.warning("Could not save metadata for bulk job %s", job.id)
+
+    def _prune(self):
+        # Called with the lock held. Finished jobs stay reachable by ID until
+        # they expire, but new submissions no longer attach to them.
+        for key, job in list(self._active.items()):
+            if job.finished:
+                del self._active[key]
+        cutoff = time.time() - self.retention
+        for job_id, job in list(self._jobs.items()):
+            # finished_at is set a moment after the status, once the history is written
+            if job.finished_at is not None and job.finished_at < cutoff:
+                del self._jobs[job_id]
+        for name in os.listdir(self.result_dir):
+            path = os.path.join(self.result_dir, name)
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+            except OSError:
+                pass
+
+
+_default_runner = None
+_default_runner_lock = threading.Lock()
+
+
+def get_job_runner():
+    """Return the process-wide runner shared by every session"""
+    global _default_runner
+    with _default_runner_lock:
+        if _default_runner is None:
+            _default_runner = JobRunner()
+        return _default_runner
@@ -0,0 +1,141 @@
+import threading
+import time
+
+# Requests a host may have in flight before it has given any feedback
+INITIAL_LIMIT = 4
+MIN_LIMIT = 1
+MAX_LIMIT = 32
+# Multiplicative decrease on 429s, 5xx, timeouts and connection errors,
+# and the gentler one on a latency spike
+OVERLOAD_DECREASE = 0.5
+LATENCY_DECREASE = 0.8
+# A spike is short-term smoothed latency this many times the long-term one
+LATENCY_SPIKE_RATIO = 2.0
+# Responses needed before latency is trusted for spikes and timeouts
+MIN_LATENCY_SAMPLES = 16
+# Longest Retry-After honoured, so a bogus header cannot stall a run
+RETRY_AFTER_MAX_SECONDS = 60.0
+# Shortest read timeout derived from observed latency
+TIMEOUT_FLOOR_SECONDS = 2.0
+
+# Smoothing weights of the short- and long-term latency averages
+_SHORT_WEIGHT = 1 / 8
+_LONG_WEIGHT = 1 / 64
+
+
+class AdaptiveLimiter:
+    """
+    Additive-increase/multiplicative-decrease cap on one host's requests in flight
+    Each answered request that found the limit fully used raises it by
+    1/limit, about one more request per round trip. An overload signal (429,
+    5xx, timeout, connection error) halves it, and a latency spike cuts it to
+    80%, at most once per round trip so one burst of failures counts once.
+    A Retry-After pauses the host until it expires. timeout() turns the
+    smoothed latency into a read timeout the way TCP derives its RTO.
+    """
+
+    def __init__(self, initial=INITIAL_LIMIT, minimum=MIN_LIMIT, maximum=MAX_LIMIT):
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.in_flight = 0
+        self._short = None
+        self._long = None
+        self._deviation = 0.0
+        self._samples = 0
+        self._timeout_backoff = 1
+        self._paused_until = 0.0
+        self._last_decrease = 0.0
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        """Block until a slot is free and the host is not paused; returns the seconds waited"""
+        start = time.monotonic()
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    self._cond.wait(self._paused_until - now)
+                elif self.in_flight >= int(self.limit):
+                    self._cond.wait()
+                else:
+                    self.in_flight += 1
+                    return now - start
+
+    def release(self, seconds, overloaded=False, timed_out=False, retry_after=None):
+        """
+        Free a slot and adapt the limit to how the request went
+        seconds is its latency; overloaded marks a response or error that
+        means the host is struggling, timed_out a read timeout among those.
+        """
+        with self._cond:
+            fully_used = self.in_flight >= int(self.limit)
+            self.in_flight -= 1
+            now = time.monotonic()
+            if retry_after:
+                self._paused_until = max(self._paused_until, now + min(retry_after, RETRY_AFTER_MAX_SECONDS))
+            if overloaded:
+                if timed_out:
+                    self._timeout_backoff = min(self._timeout_backoff * 2, 64)
+                self._decrease(now, OVERLOAD_DECREASE)
+            else:
+                self._timeout_backoff = 1
+                self._observe(seconds)
+                if self._samples >= MIN_LATENCY_SAMPLES and self._short > LATENCY_SPIKE_RATIO * self._long:
+                    self._decrease(now, LATENCY_DECREASE)
+                elif fully_used:
+                    self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            self._cond.notify_all()
+
+    def _observe(self, seconds):
+        # Called with the lock held
+        self._samples += 1
+        if self._short is None:
+            self._short = self._long = seconds
+            self._deviation = seconds / 2
+            return
+        self._deviation += _SHORT_WEIGHT * (abs(seconds - self._short) - self._deviation)
+        self._short += _SHORT_WEIGHT * (seconds - self._short)
+        self._long += _LONG_WEIGHT * (seconds - self._long)
+
+    def _decrease(self, now, factor):
+        # Called with the lock held
+        if now - self._last_decrease >= (self._short or 0.0):
+            self.limit = max(float(self.minimum), self.limit * factor)
+            self._last_decrease = now
+
+    def timeout(self, requested):
+        """
+        Read timeout for the next request: requested, shortened to a few
+        smoothed round trips once enough responses have been seen, and
+        lengthened again after timeouts
+        """
+        if not isinstance(requested, (int, float)):
+            return requested
+        with self._cond:
+            if self._samples < MIN_LATENCY_SAMPLES:
+                return requested
+            derived = max(TIMEOUT_FLOOR_SECONDS, self._short + 4 * self._deviation) * self._timeout_backoff
+        return min(requested, derived)
+
+    def state(self):
+        with self._cond:
+            return {
+                'limit': self.limit,
+                'in_flight': self.in_flight,
+                'latency_seconds': self._short,
+                'paused_seconds': max(0.0, self._paused_until - time.monotonic()),
+            }
+
+
+def describe_states(states):
+    """One line summarising every host's limiter, for progress text"""
+    parts = []
+    for host, state in states.items():
+        part = f"{host}: {state['in_flight']}/{int(state['limit'])} in flight"
+        if state['latency_seconds'] is not None:
+            part += f", {state['latency_seconds'] * 1000:.0f} ms"
+        if state['paused_seconds']:
+            part += f", paused {state['paused_seconds']:.0f}s (Retry-After)"
+        parts.append(part)
+    return " · ".join(parts)
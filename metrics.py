@@ -0,0 +1,254 @@
+import bisect
+import json
+import threading
+
+# Upper bounds in seconds of the histogram buckets; larger values land in
+# a final overflow bucket
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+PARSE_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25)
+
+# Outcome labels for requests that never got a status code
+TIMEOUT = 'timeout'
+CONNECTION_ERROR = 'connection_error'
+REQUEST_ERROR = 'error'
+
+# Response cache lookup results
+CACHE_HIT = 'hit'
+CACHE_NEGATIVE_HIT = 'negative_hit'
+CACHE_MISS = 'miss'
+CACHE_REVALIDATED = 'revalidated'
+
+PROMETHEUS_PREFIX = 'scraper'
+
+
+class Histogram:
+    """
+    Per-bucket observation counts plus their sum and count
+    counts has one more entry than buckets, for values above the last bound.
+    """
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def snapshot(self):
+        return {'buckets': list(self.buckets), 'counts': list(self.counts), 'sum': self.sum, 'count': self.count}
+
+
+class Metrics:
+    """
+    Thread-safe counters and histograms for upstream calls
+    Records per-host request latency, status codes, retries and time spent
+    waiting on the rate limiter or backing off, badge SVG parse time and
+    response cache results. snapshot() returns plain dicts that to_json() and
+    to_prometheus() render, and that subtract_snapshots() can diff to get
+    the numbers for a single run.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._hosts = {}
+            self._parse = Histogram(PARSE_BUCKETS)
+            self._cache = {}
+
+    def _host(self, host):
+        stats = self._hosts.get(host)
+        if stats is None:
+            stats = {
+                'latency': Histogram(LATENCY_BUCKETS),
+                'statuses': {},
+                'retries': 0,
+                'rate_limit_wait_seconds': 0.0,
+                'backoff_seconds': 0.0,
+            }
+            self._hosts[host] = stats
+        return stats
+
+    def observe_request(self, host, outcome, seconds):
+        """Record one attempt; outcome is the status code or an error label"""
+        with self._lock:
+            stats = self._host(host)
+            stats['latency'].observe(seconds)
+            outcome = str(outcome)
+            stats['statuses'][outcome] = stats['statuses'].get(outcome, 0) + 1
+
+    def observe_retry(self, host, backoff_seconds):
+        with self._lock:
+            stats = self._host(host)
+            stats['retries'] += 1
+            stats['backoff_seconds'] += backoff_seconds
+
+    def observe_rate_limit_wait(self, host, seconds):
+        with self._lock:
+            self._host(host)['rate_limit_wait_seconds'] += seconds
+
+    def observe_parse(self, seconds):
+        with self._lock:
+            self._parse.observe(seconds)
+
+    def observe_cache(self, service, result):
+        """Count a cache lookup; result is one of the CACHE_* labels"""
+        with self._lock:
+            counts = self._cache.setdefault(service, {})
+            counts[result] = counts.get(result, 0) + 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'hosts': {
+                    host: {
+                        'requests': stats['latency'].count,
+                        'latency': stats['latency'].snapshot(),
+                        'statuses': dict(stats['statuses']),
+                        'retries': stats['retries'],
+                        'rate_limit_wait_seconds': stats['rate_limit_wait_seconds'],
+                        'backoff_seconds': stats['backoff_seconds'],
+                    }
+                    for host, stats in self._hosts.items()
+                },
+                'parse': self._parse.snapshot(),
+                'cache': {service: dict(counts) for service, counts in self._cache.items()},
+            }
+
+
+def subtract_snapshots(after, before):
+    """
+    Difference of two snapshots from the same registry
+    Counters missing from before count as zero.
+    """
+    if isinstance(after, dict):
+        before = before or {}
+        return {
+            key: value if key == 'buckets' else subtract_snapshots(value, before.get(key))
+            for key, value in after.items()
+        }
+    if isinstance(after, list):
+        return [a - b for a, b in zip(after, before or [0] * len(after))]
+    return after - (before or 0)
+
+
+def histogram_quantile(histogram, q):
+    """
+    Estimate the q-quantile of a histogram snapshot by interpolating within
+    its bucket, as Prometheus does. Returns None for an empty histogram.
+    """
+    if not histogram['count']:
+        return None
+    rank = q * histogram['count']
+    seen = 0
+    lower = 0.0
+    for upper, count in zip(histogram['buckets'], histogram['counts']):
+        if count and seen + count >= rank:
+            return lower + (upper - lower) * (rank - seen) / count
+        seen += count
+        lower = upper
+    # Only the overflow bucket is left, which has no upper bound
+    return lower
+
+
+def summary_rows(snapshot):
+    """One row per upstream host with the figures worth tuning concurrency on"""
+    rows = []
+    for host, stats in snapshot['hosts'].items():
+        latency = stats['latency']
+        statuses = stats['statuses']
+        p50 = histogram_quantile(latency, 0.5)
+        p95 = histogram_quantile(latency, 0.95)
+        rows.append({
+            'Host': host,
+            'Requests': stats['requests'],
+            'OK (2xx)': sum(n for outcome, n in statuses.items() if outcome.startswith('2')),
+            '429s': statuses.get('429', 0),
+            '5xx': sum(n for outcome, n in statuses.items() if outcome.startswith('5')),
+            'Timeouts': statuses.get(TIMEOUT, 0),
+            'Connection errors': statuses.get(CONNECTION_ERROR, 0),
+            'Retries': stats['retries'],
+            'Mean ms': latency['sum'] / latency['count'] * 1000 if latency['count'] else None,
+            'p50 ms': None if p50 is None else p50 * 1000,
+            'p95 ms': None if p95 is None else p95 * 1000,
+            'Rate limit wait s': stats['rate_limit_wait_seconds'],
+            'Backoff s': stats['backoff_seconds'],
+        })
+    return rows
+
+
+def to_json(snapshot):
+    return json.dumps(snapshot, indent=2)
+
+
+def _labels(**labels):
+    return '{' + ','.join(f'{name}="{value}"' for name, value in labels.items()) + '}'
+
+
+def _histogram_lines(name, histogram, **labels):
+    lines = []
+    cumulative = 0
+    for upper, count in zip(histogram['buckets'] + ['+Inf'], histogram['counts']):
+        cumulative += count
+        lines.append(f"{name}_bucket{_labels(**labels, le=upper)} {cumulative}")
+    lines.append(f"{name}_sum{_labels(**labels) if labels else ''} {histogram['sum']}")
+    lines.append(f"{name}_count{_labels(**labels) if labels else ''} {histogram['count']}")
+    return lines
+
+
+def to_prometheus(snapshot):
+    """Render a snapshot in the Prometheus text exposition format"""
+    p = PROMETHEUS_PREFIX
+    lines = [
+        f"# HELP {p}_request_duration_seconds Latency of each upstream request attempt",
+        f"# TYPE {p}_request_duration_seconds histogram",
+    ]
+    for host, stats in snapshot['hosts'].items():
+        lines += _histogram_lines(f"{p}_request_duration_seconds", stats['latency'], host=host)
+
+    lines += [
+        f"# HELP {p}_responses_total Upstream request attempts by status code or error",
+        f"# TYPE {p}_responses_total counter",
+    ]
+    for host, stats in snapshot['hosts'].items():
+        for outcome, count in stats['statuses'].items():
+            lines.append(f"{p}_responses_total{_labels(host=host, status=outcome)} {count}")
+
+    for key, name, help_text in (
+        ('retries', f"{p}_retries_total", "Upstream requests retried"),
+        ('backoff_seconds', f"{p}_backoff_seconds_total", "Time spent sleeping between retries"),
+        ('rate_limit_wait_seconds', f"{p}_rate_limit_wait_seconds_total",
+         "Time spent waiting on the client-side rate and concurrency limiters"),
+    ):
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+        for host, stats in snapshot['hosts'].items():
+            lines.append(f"{name}{_labels(host=host)} {stats[key]}")
+
+    lines += [
+        f"# HELP {p}_badge_parse_seconds Time spent parsing HackerRank badge SVGs",
+        f"# TYPE {p}_badge_parse_seconds histogram",
+    ]
+    lines += _histogram_lines(f"{p}_badge_parse_seconds", snapshot['parse'])
+
+    lines += [
+        f"# HELP {p}_cache_lookups_total Response cache lookups by result",
+        f"# TYPE {p}_cache_lookups_total counter",
+    ]
+    for service, counts in snapshot['cache'].items():
+        for result, count in counts.items():
+            lines.append(f"{p}_cache_lookups_total{_labels(service=service, result=result)} {count}")
+    return '\n'.join(lines) + '\n'
+
+
+_default_metrics = Metrics()
+
+
+def get_metrics():
+    """Return the process-wide registry every upstream call reports to"""
+    return _default_metrics
@@ -0,0 +1,4 @@
+# Content types of the files the dashboard offers for download. Kept apart
+# from export so the upload page can name them without loading xlsxwriter.
+XLSX_MIME = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+CSV_MIME = "text/csv"
@@ -0,0 +1,74 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from scraper import badges_from_svg, fetch_hackerrank_svg, fetch_leetcode_stats, fetch_recent_submissions
+
+# Upstream calls for looked-up students that may run at the same time
+PREFETCH_WORKERS = int(os.environ.get('PROFILE_PREFETCH_WORKERS', 8))
+
+
+class StudentPrefetch:
+    """
+    Every upstream call for one student, all started at once
+    The attributes are futures (None when the student has no username for
+    that site); result() blocks until that one call is done and raises
+    whatever the fetch raised. The HackerRank SVG is downloaded once and
+    serves both the badge image and the parsed badge list, which is parsed
+    once per instance.
+    """
+
+    def __init__(self, executor, leetcode_username, hackerrank_username, force_refresh=False):
+        self.leetcode_stats = None
+        self.submissions = None
+        self.hackerrank_svg = None
+        self._badges = None
+        self._badges_parsed = False
+        if leetcode_username:
+            self.leetcode_stats = executor.submit(fetch_leetcode_stats, leetcode_username, 10, force_refresh)
+            self.submissions = executor.submit(fetch_recent_submissions, leetcode_username, 10, force_refresh)
+        if hackerrank_username:
+            self.hackerrank_svg = executor.submit(fetch_hackerrank_svg, hackerrank_username, force_refresh)
+
+    def hackerrank_badges(self):
+        """Badges parsed from the prefetched SVG, or None when there is no SVG or no badges"""
+        if not self._badges_parsed:
+            svg_xml = self.hackerrank_svg.result()
+            self._badges = badges_from_svg(svg_xml) if svg_xml else None
+            self._badges_parsed = True
+        return self._badges
+
+    def failed(self):
+        """
+        True once any call has raised, so fetching again may help
+        A None result is not a failure: unknown users come back as None from
+        the negative cache, and looking them up again would only hit the
+        upstream when force_refresh is set.
+        """
+        for future in (self.leetcode_stats, self.submissions, self.hackerrank_svg):
+            if future is not None and future.done() and future.exception() is not None:
+                return True
+        return False
+
+
+class ProfilePrefetcher:
+    """Starts a student's lookups in the background as soon as the roll number is entered"""
+
+    def __init__(self, max_workers=PREFETCH_WORKERS):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='prefetch')
+
+    def prefetch(self, leetcode_username=None, hackerrank_username=None, force_refresh=False):
+        return StudentPrefetch(self._executor, leetcode_username, hackerrank_username, force_refresh)
+
+
+_default_prefetcher = None
+_default_prefetcher_lock = threading.Lock()
+
+
+def get_prefetcher():
+    """Return the process-wide prefetcher shared by every session"""
+    global _default_prefetcher
+    with _default_prefetcher_lock:
+        if _default_prefetcher is None:
+            _default_prefetcher = ProfilePrefetcher()
+        return _default_prefetcher
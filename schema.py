@@ -0,0 +1,341 @@
+import itertools
+import os
+import re
+
+import pandas as pd
+
+ROLL_NUMBER = 'Roll Number'
+LEETCODE_PROFILE = 'LeetCode profile'
+HACKERRANK_PROFILE = 'Hackerrank profile'
+# Optional; only links to codechef.com in it are read
+CODECHEF_PROFILE = 'CodeChef profile'
+CGPA = 'CGPA'
+TOTAL_BACKLOGS = 'Total Backlogs'
+# Optional; used to break analytics down by class section when present
+SECTION = 'Section'
+# Optional; shown next to roll numbers on leaderboards
+NAME = 'Name'
+# Optional; when a student is listed more than once the latest submission wins
+COMPLETION_TIME = 'Completion time'
+
+# Usernames extracted from the profile links at load time: None when there
+# is no link, '' when the link is unusable (LINK_PROBLEMS says why)
+LEETCODE_USERNAME = 'LeetCode Username'
+HACKERRANK_USERNAME = 'HackerRank Username'
+CODECHEF_USERNAME = 'CodeChef Username'
+LINK_PROBLEMS = 'Link Problems'
+DERIVED_COLUMNS = [LEETCODE_USERNAME, HACKERRANK_USERNAME, CODECHEF_USERNAME, LINK_PROBLEMS]
+
+# Header spellings seen in cohort files, keyed by their squashed form
+# (lowercase, letters and digits only)
+COLUMN_ALIASES = {
+    'rollnumber': ROLL_NUMBER,
+    'rollno': ROLL_NUMBER,
+    'roll': ROLL_NUMBER,
+    'leetcodeprofile': LEETCODE_PROFILE,
+    'leetcodeprofilelink': LEETCODE_PROFILE,
+    'leetcodelink': LEETCODE_PROFILE,
+    'leetcodelinks': LEETCODE_PROFILE,
+    'leetcodeurl': LEETCODE_PROFILE,
+    'leetcode': LEETCODE_PROFILE,
+    'hackerrankprofile': HACKERRANK_PROFILE,
+    'hackerrankprofilelink': HACKERRANK_PROFILE,
+    'hackerranklink': HACKERRANK_PROFILE,
+    'hackerranklinks': HACKERRANK_PROFILE,
+    'hackerrankurl': HACKERRANK_PROFILE,
+    'hackerrank': HACKERRANK_PROFILE,
+    'cgpa': CGPA,
+    'totalbacklogs': TOTAL_BACKLOGS,
+    'backlogs': TOTAL_BACKLOGS,
+    'codechefprofile': CODECHEF_PROFILE,
+    'codechefprofilelink': CODECHEF_PROFILE,
+    'codechefurl': CODECHEF_PROFILE,
+    'codechef': CODECHEF_PROFILE,
+    'anyothercodingplatformsifapplicable': CODECHEF_PROFILE,
+    'section': SECTION,
+    'sec': SECTION,
+    'name': NAME,
+    'studentname': NAME,
+    'fullname': NAME,
+    'completiontime': COMPLETION_TIME,
+    'timestamp': COMPLETION_TIME,
+}
+
+# Columns every loaded frame has, added empty when a file lacks them
+CANONICAL_COLUMNS = [ROLL_NUMBER, LEETCODE_PROFILE, HACKERRANK_PROFILE, CGPA, TOTAL_BACKLOGS]
+# Read when present; any other column in an upload is skipped
+OPTIONAL_COLUMNS = [NAME, SECTION, CODECHEF_PROFILE, COMPLETION_TIME]
+NUMERIC_COLUMNS = [CGPA, TOTAL_BACKLOGS]
+
+# Types of the loaded columns: text as pandas strings, sections as
+# categories, CGPA as float and backlogs as nullable small ints
+STUDENT_DTYPES = {
+    ROLL_NUMBER: 'string',
+    NAME: 'string',
+    SECTION: 'category',
+    LEETCODE_PROFILE: 'string',
+    HACKERRANK_PROFILE: 'string',
+    CODECHEF_PROFILE: 'string',
+    CGPA: 'float64',
+    TOTAL_BACKLOGS: 'Int8',
+    COMPLETION_TIME: 'datetime64[ns]',
+}
+
+# Rows parsed at a time when reading a student file
+READ_CHUNK_ROWS = int(os.environ.get('STUDENT_READ_CHUNK_ROWS', 20000))
+
+_NON_ALNUM = re.compile(r'[^0-9a-z]')
+
+_LINK_END = r'/?(?:[?#].*)?$'
+_USERNAME = r'([A-Za-z0-9][\w.-]*)'
+# Site pages whose path looks like a profile but has no username in it
+_LEETCODE_PAGES = (
+    'u', 'profile', 'problemset', 'problems', 'problem-list', 'contest', 'discuss', 'explore', 'studyplan',
+    'accounts', 'account', 'login', 'subscribe', 'submissions', 'progress', 'assessment', 'interview', 'store',
+)
+_HACKERRANK_PAGES = (
+    'profile', 'dashboard', 'domains', 'challenges', 'contests', 'certificates', 'certify', 'skills-verification',
+    'interview', 'jobs', 'leaderboard', 'settings', 'auth', 'login', 'signup', 'prepare', 'work', 'products',
+)
+
+
+def _not_page(pages):
+    return r'(?!(?:' + '|'.join(map(re.escape, pages)) + r')(?:[/?#]|$))'
+
+
+# One capture group per URL shape; the username is the first that matched.
+# Site pages are only ruled out for bare leetcode.com/<name> links, since
+# after /u/ or /profile/ any handle is a username, even 'contest'.
+LEETCODE_LINK = re.compile(
+    r'^(?:https?://)?(?:www\.)?leetcode\.com/(?:(?:u|profile)/|' + _not_page(_LEETCODE_PAGES) + r')'
+    + _USERNAME + _LINK_END,
+    re.IGNORECASE,
+)
+# /profile/<user> may be followed by a tab such as /badges
+HACKERRANK_LINK = re.compile(
+    r'^(?:https?://)?(?:www\.)?hackerrank\.com/(?:profile/' + _USERNAME + r'(?:/[^?#]*)?'
+    r'|' + _not_page(_HACKERRANK_PAGES) + _USERNAME + r')' + _LINK_END,
+    re.IGNORECASE,
+)
+CODECHEF_LINK = re.compile(r'^(?:https?://)?(?:www\.)?codechef\.com/users/' + _USERNAME + _LINK_END, re.IGNORECASE)
+# A bare handle typed instead of a link
+BARE_USERNAME = re.compile(r'^@?' + _USERNAME + r'$')
+# What students write when they have no profile
+NO_PROFILE = re.compile(r'^(?:no+|nil|none|null|n/?a|-+|\.+)$', re.IGNORECASE)
+
+# Profile link column -> (username column, site name, domain, link pattern,
+# whether bare handles and other links count, i.e. the column is only for that site)
+PROFILE_LINKS = {
+    LEETCODE_PROFILE: (LEETCODE_USERNAME, 'LeetCode', 'leetcode.com', LEETCODE_LINK, True),
+    HACKERRANK_PROFILE: (HACKERRANK_USERNAME, 'HackerRank', 'hackerrank.com', HACKERRANK_LINK, True),
+    CODECHEF_PROFILE: (CODECHEF_USERNAME, 'CodeChef', 'codechef.com', CODECHEF_LINK, False),
+}
+
+
+def canonical_column(name):
+    """Map a header from any cohort file onto the dashboard's column name"""
+    name = str(name).strip()
+    return COLUMN_ALIASES.get(_NON_ALNUM.sub('', name.lower()), name)
+
+
+def normalize_students(df):
+    """
+    Rename known header variants to canonical columns, add missing ones,
+    apply STUDENT_DTYPES (unparseable numbers become missing) and extract
+    profile usernames
+    Raises ValueError if no roll number column can be found
+    """
+    renamed = {}
+    for col in df.columns:
+        canonical = canonical_column(col)
+        # Keep the first column that maps onto each canonical name
+        if canonical not in renamed.values():
+            renamed[col] = canonical
+        else:
+            renamed[col] = str(col).strip()
+    df = df.rename(columns=renamed)
+
+    if ROLL_NUMBER not in df.columns:
+        raise ValueError(f"No '{ROLL_NUMBER}' column found in the uploaded file")
+
+    for col in CANONICAL_COLUMNS:
+        if col not in df.columns:
+            df[col] = pd.NA
+    for col in NUMERIC_COLUMNS:
+        df[col] = pd.to_numeric(df[col], errors='coerce')
+    df[TOTAL_BACKLOGS] = df[TOTAL_BACKLOGS].round()
+    if SECTION in df.columns:
+        df[SECTION] = df[SECTION].astype('string').str.strip()
+    if COMPLETION_TIME in df.columns:
+        df[COMPLETION_TIME] = _parse_times(df[COMPLETION_TIME])
+    df = df.astype({col: dtype for col, dtype in STUDENT_DTYPES.items() if col in df.columns})
+
+    problems = pd.Series(pd.NA, index=df.index, dtype='string')
+    for link_column, (username_column, site, domain, pattern, dedicated) in PROFILE_LINKS.items():
+        links = df[link_column] if link_column in df.columns else pd.Series(pd.NA, index=df.index)
+        usernames, problem = parse_profile_links(links, domain, pattern, dedicated)
+        df[username_column] = usernames
+        problem = site + ': ' + problem
+        problems = (problems + '; ' + problem).fillna(problems).fillna(problem)
+    df[LINK_PROBLEMS] = problems
+    return df
+
+
+def parse_profile_links(links, domain, pattern, dedicated=True):
+    """
+    Extract usernames from a column of profile links in one vectorized pass
+    Links must match pattern; in a dedicated column a bare handle such as
+    'name' or '@name' is taken as the username too, and anything else is a
+    problem. In a shared column only links to domain are read.
+    Returns (usernames, problems): usernames holds None where there is no
+    link and '' where the link is unusable, and problems says why for those.
+    """
+    text = links.astype('string').str.strip()
+    present = text.notna() & text.ne('') & ~text.str.fullmatch(NO_PROFILE).fillna(False)
+    on_site = text.str.contains(domain, case=False, regex=False).fillna(False)
+
+    matched = text.str.extract(pattern)
+    usernames = matched.bfill(axis=1).iloc[:, 0]
+    if dedicated:
+        bare = text.str.extract(BARE_USERNAME)[0].where(~on_site)
+        usernames = usernames.fillna(bare)
+        relevant = present
+    else:
+        relevant = present & on_site
+
+    usernames = usernames.where(relevant)
+    invalid = relevant & usernames.isna()
+    problems = pd.Series(pd.NA, index=links.index, dtype='string')
+    problems = problems.mask(invalid & on_site, 'link has no username')
+    problems = problems.mask(invalid & ~on_site & text.str.contains('/', regex=False).fillna(False),
+                             f'not a {domain} link')
+    problems = problems.mask(invalid & problems.isna(), 'not a username')
+
+    usernames = usernames.astype(object).where(relevant, None).where(~invalid, '')
+    return usernames, problems
+
+
+def _parse_times(values):
+    # ISO timestamps and spreadsheet datetimes are read as such; anything
+    # else is day-first, as the form exports write it
+    iso = pd.to_datetime(values, format='ISO8601', errors='coerce')
+    return iso.fillna(pd.to_datetime(values.where(iso.isna()), dayfirst=True, errors='coerce'))
+
+
+def read_students(*sources):
+    """
+    Read one or more student files (CSV or .xlsx) from paths or file objects
+    A file object is read as .xlsx when its name attribute says so. Each
+    file is read READ_CHUNK_ROWS rows at a time, parsing only the columns
+    the dashboard uses, and each chunk is normalized on its own, so files
+    with different headers land on one schema. Students listed more than
+    once, in one file or across several, are merged by latest_submissions.
+    Returns a DataFrame normalized to the canonical schema
+    Raises ValueError if a file has no roll number column
+    """
+    chunks = []
+    for number, source in enumerate(sources, 1):
+        try:
+            chunks.extend(normalize_students(chunk) for chunk in _read_chunks(source))
+        except ValueError as e:
+            if len(sources) > 1:
+                raise ValueError(f"{_source_name(source) or f'File {number}'}: {e}") from e
+            raise
+    df = pd.concat(chunks, ignore_index=True)
+    # Chunks differ in their columns and section categories
+    df = df.astype({col: dtype for col, dtype in STUDENT_DTYPES.items() if col in df.columns})
+    return latest_submissions(df)
+
+
+def latest_submissions(df):
+    """
+    Keep one row per roll number (compared as roll_key does)
+    The row with the latest Completion time is kept; rows without one count
+    as older than any row with one, and among equals the last row wins.
+    Rows without a roll number (or a blank one) are all kept, in their
+    original order.
+    """
+    keys = df[ROLL_NUMBER].str.strip().str.upper().replace('', pd.NA)
+    if COMPLETION_TIME in df.columns:
+        keys = keys.loc[df[COMPLETION_TIME].sort_values(kind='stable', na_position='first').index]
+    latest = (~keys.duplicated(keep='last') | keys.isna()).reindex(df.index)
+    return df[latest].reset_index(drop=True)
+
+
+def _source_name(source):
+    if isinstance(source, (str, os.PathLike)):
+        return os.fspath(source)
+    return getattr(source, 'name', '') or ''
+
+
+def _read_chunks(source):
+    if _source_name(source).lower().endswith('.xlsx'):
+        yield from _read_xlsx_chunks(source)
+        return
+    with pd.read_csv(source, usecols=_used_column, dtype='string', chunksize=READ_CHUNK_ROWS) as reader:
+        yield from reader
+
+
+def _read_xlsx_chunks(source):
+    # Imported here so CSV-only deployments never load openpyxl
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(source, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = next(rows, ())
+        used = [i for i, name in enumerate(header) if name is not None and _used_column(name)]
+        columns = [header[i] for i in used]
+        # Cells are kept as loaded (numbers, datetimes, text) for normalize_students to type
+        rows = ([row[i] if i < len(row) else None for i in used] for row in rows)
+        rows = (row for row in rows if any(value is not None for value in row))
+        yielded = False
+        while chunk := list(itertools.islice(rows, READ_CHUNK_ROWS)):
+            yielded = True
+            yield pd.DataFrame(chunk, columns=columns, dtype=object)
+        if not yielded:
+            yield pd.DataFrame(columns=columns, dtype=object)
+    finally:
+        workbook.close()
+
+
+def _used_column(name):
+    return canonical_column(name) in STUDENT_DTYPES
+
+
+class StudentTable:
+    """
+    A normalized student frame with a roll-number index
+    Roll numbers are stripped and uppercased once, so lookups are a dict hit
+    instead of a scan of the whole column on every rerun. link_problems
+    lists the rows whose profile links could not be used, and
+    missing_roll_numbers the rows that cannot be looked up, resumed or
+    tracked over time because they have no roll number.
+    """
+
+    def __init__(self, df):
+        self.df = df
+        link_columns = [col for col in PROFILE_LINKS if col in df.columns]
+        self.link_problems = df.loc[df[LINK_PROBLEMS].notna(), [ROLL_NUMBER, *link_columns, LINK_PROBLEMS]]
+        self.roll_index = {}
+        missing = []
+        for position, roll_number in enumerate(df[ROLL_NUMBER]):
+            key = roll_key(roll_number)
+            if key is None:
+                missing.append(position)
+            else:
+                self.roll_index.setdefault(key, position)
+        shown = [col for col in (NAME, *link_columns) if col in df.columns]
+        self.missing_roll_numbers = df.iloc[missing][shown]
+
+    def lookup(self, roll_number):
+        """Return the first row for roll_number, or None if it is not in the table"""
+        position = self.roll_index.get(roll_key(roll_number))
+        return None if position is None else self.df.iloc[position]
+
+
+def roll_key(roll_number):
+    """Roll number stripped and uppercased, or None when it is missing or blank"""
+    if roll_number is None or pd.isna(roll_number):
+        return None
+    return str(roll_number).strip().upper() or None
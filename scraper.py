@@ -0,0 +1,264 @@
+import logging
+import os
+import time
+from urllib.parse import urlsplit
+
+from badges import get_badge_memo, parse_badges_svg
+from blobstore import get_blob_store
+from cache import NOT_MODIFIED, Fetched, get_cache
+from http_client import get_client
+from metrics import CACHE_HIT, CACHE_MISS, CACHE_NEGATIVE_HIT, get_metrics
+from singleflight import get_single_flight
+
+logger = logging.getLogger(__name__)
+
+# Upstream endpoints; overridable so benchmarks can point at local stand-ins
+LEETCODE_STATS_URL = os.environ.get('LEETCODE_STATS_URL', 'https://leetcode-stats-api.herokuapp.com')
+HACKERRANK_BADGES_URL = os.environ.get('HACKERRANK_BADGES_URL', 'https://hackerrank-badges.vercel.app')
+LEETCODE_GRAPHQL_URL = os.environ.get('LEETCODE_GRAPHQL_URL', 'https://leetcode.com/graphql')
+
+LEETCODE_STATS_HOST = urlsplit(LEETCODE_STATS_URL).netloc
+HACKERRANK_BADGES_HOST = urlsplit(HACKERRANK_BADGES_URL).netloc
+LEETCODE_GRAPHQL_HOST = urlsplit(LEETCODE_GRAPHQL_URL).netloc
+
+RECENT_SUBMISSIONS_QUERY = """
+query recentSubmissions($username: String!) {
+    recentSubmissionList(username: $username) {
+        title
+        titleSlug
+        timestamp
+        statusDisplay
+        lang
+    }
+}
+"""
+
+# Usernames resolved per batched GraphQL request; 0 or 1 turns batching off
+LEETCODE_BATCH_SIZE = int(os.environ.get('LEETCODE_BATCH_SIZE', 50))
+
+SOLVED_COUNTS_FIELDS = """
+        submitStatsGlobal {
+            acSubmissionNum {
+                difficulty
+                count
+            }
+        }"""
+
+GRAPHQL_HEADERS = {
+    'Content-Type': 'application/json',
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+}
+
+# Cache namespaces for upstream responses
+LEETCODE_STATS_SERVICE = 'leetcode_stats'
+# Maps usernames to blob digests; the SVG markup itself is in the blob store
+HACKERRANK_SVG_SERVICE = 'hackerrank_svg_digest'
+LEETCODE_SUBMISSIONS_SERVICE = 'leetcode_submissions'
+LEETCODE_SOLVED_SERVICE = 'leetcode_solved'
+
+
+def conditional_headers(validators):
+    """Request headers revalidating a cached response with the given validators"""
+    headers = {}
+    if 'etag' in validators:
+        headers['If-None-Match'] = validators['etag']
+    if 'last_modified' in validators:
+        headers['If-Modified-Since'] = validators['last_modified']
+    return headers
+
+
+def with_validators(response, value):
+    """Wrap a 200 response's value with its validators for the cache"""
+    return Fetched(value, etag=response.headers.get('ETag'), last_modified=response.headers.get('Last-Modified'))
+
+
+def fetch_leetcode_stats(username, timeout=5, force_refresh=False):
+    """
+    Fetch solved-problem counts for a LeetCode user from the stats API
+    Concurrent calls for the same username share one lookup.
+    Unknown users are cached for the shorter negative TTL.
+    Returns the JSON payload, or None if the API did not answer with 200
+    or does not know the user
+    """
+    def fetch(validators):
+        stats_api_url = f"{LEETCODE_STATS_URL}/{username}"
+        stats_response = get_client().get(stats_api_url, timeout=timeout, headers=conditional_headers(validators))
+        if stats_response.status_code == 304:
+            return NOT_MODIFIED
+        if stats_response.status_code == 200:
+            stats = stats_response.json()
+            # The API answers 200 with status 'error' for users that do not exist
+            if stats.get('status') == 'error':
+                return Fetched(None, negative=True)
+            return with_validators(stats_response, stats)
+        if stats_response.status_code == 404:
+            return Fetched(None, negative=True)
+        return None
+
+    return get_single_flight().do(
+        (LEETCODE_STATS_SERVICE, username, force_refresh),
+        lambda: get_cache().get_or_fetch(LEETCODE_STATS_SERVICE, username, fetch, force_refresh),
+    )
+
+
+def solved_counts_query(count):
+    """GraphQL query resolving count users at once, aliased u0..u<count-1>"""
+    variables = ', '.join(f"$u{i}: String!" for i in range(count))
+    fields = '\n'.join(
+        f"    u{i}: matchedUser(username: $u{i}) {{{SOLVED_COUNTS_FIELDS}\n    }}" for i in range(count)
+    )
+    return f"query solvedCounts({variables}) {{\n{fields}\n}}"
+
+
+def fetch_leetcode_solved_batch(usernames, timeout=15, force_refresh=False):
+    """
+    Fetch solved counts for many LeetCode users in one leetcode.com/graphql request
+    Returns a dict of username -> {'totalSolved', 'easySolved', 'mediumSolved',
+    'hardSolved'} (the stats API's field names). Users the endpoint did not
+    resolve, now or within the negative TTL, are left out, and only cached
+    users are returned if the request failed.
+    """
+    cache = get_cache()
+    solved = {}
+    missing = []
+    for username in dict.fromkeys(usernames):
+        found, cached = False, None
+        if not force_refresh:
+            found, cached = cache.lookup(LEETCODE_SOLVED_SERVICE, username)
+            get_metrics().observe_cache(
+                LEETCODE_SOLVED_SERVICE,
+                CACHE_MISS if not found else CACHE_HIT if cached is not None else CACHE_NEGATIVE_HIT,
+            )
+        if not found:
+            missing.append(username)
+        elif cached is not None:
+            solved[username] = cached
+    if not missing:
+        return solved
+
+    response = get_client().post(
+        LEETCODE_GRAPHQL_URL,
+        json={
+            'query': solved_counts_query(len(missing)),
+            'variables': {f"u{i}": username for i, username in enumerate(missing)},
+        },
+        headers=GRAPHQL_HEADERS,
+        timeout=timeout
+    )
+    if response.status_code != 200:
+        logger.warning("Batched LeetCode lookup of %d users failed: HTTP %s", len(missing), response.status_code)
+        return solved
+
+    # Unknown users come back as null, usually alongside an 'errors' list
+    data = response.json().get('data') or {}
+    for i, username in enumerate(missing):
+        user = data.get(f"u{i}")
+        if not user:
+            if f"u{i}" in data:
+                cache.set(LEETCODE_SOLVED_SERVICE, username, None, negative=True)
+            continue
+        counts = {
+            item['difficulty']: item['count']
+            for item in (user.get('submitStatsGlobal') or {}).get('acSubmissionNum') or []
+        }
+        stats = {
+            'totalSolved': counts.get('All', 0),
+            'easySolved': counts.get('Easy', 0),
+            'mediumSolved': counts.get('Medium', 0),
+            'hardSolved': counts.get('Hard', 0),
+        }
+        cache.set(LEETCODE_SOLVED_SERVICE, username, stats)
+        solved[username] = stats
+    return solved
+
+
+def fetch_recent_submissions(username, timeout=10, force_refresh=False):
+    """
+    Fetch the recent submission list for a LeetCode user from leetcode.com/graphql
+    Concurrent calls for the same username share one request, and empty
+    lists (private profiles) are cached for the shorter negative TTL.
+    Returns a list of submissions (empty for private profiles), or None if
+    the endpoint did not answer with 200
+    """
+    def fetch(validators):
+        response = get_client().post(
+            LEETCODE_GRAPHQL_URL,
+            json={'query': RECENT_SUBMISSIONS_QUERY, 'variables': {'username': username}},
+            headers=GRAPHQL_HEADERS,
+            timeout=timeout
+        )
+        if response.status_code == 200:
+            submissions = (response.json().get('data') or {}).get('recentSubmissionList') or []
+            return Fetched(submissions, negative=not submissions)
+        return None
+
+    return get_single_flight().do(
+        (LEETCODE_SUBMISSIONS_SERVICE, username, force_refresh),
+        lambda: get_cache().get_or_fetch(LEETCODE_SUBMISSIONS_SERVICE, username, fetch, force_refresh),
+    )
+
+
+def fetch_hackerrank_svg(username, force_refresh=False):
+    """
+    Download the badge SVG for a HackerRank user
+    Concurrent calls for the same username share one download, expired
+    SVGs are revalidated with a conditional GET, and unknown users are
+    cached for the shorter negative TTL. The markup is stored once per
+    distinct SVG in the blob store and the cache maps the username to its
+    digest; a blob evicted since is downloaded again.
+    Returns the SVG markup, or None if the badge service did not answer with 200
+    """
+    def fetch(validators):
+        badge_url = f'{HACKERRANK_BADGES_URL}/{username}'
+        response = get_client().get(badge_url, timeout=15, headers=conditional_headers(validators))
+        if response.status_code == 304:
+            return NOT_MODIFIED
+        if response.status_code == 200:
+            return with_validators(response, get_blob_store().put(response.text))
+        logger.warning("HTTP Error for %s: %s", username, response.status_code)
+        if response.status_code == 404:
+            return Fetched(None, negative=True)
+        return None
+
+    def lookup():
+        cache = get_cache()
+        digest = cache.get_or_fetch(HACKERRANK_SVG_SERVICE, username, fetch, force_refresh)
+        svg = get_blob_store().get(digest) if digest is not None else None
+        if digest is not None and svg is None:
+            # Without the stored entry the download is unconditional
+            cache.delete(HACKERRANK_SVG_SERVICE, username)
+            digest = cache.get_or_fetch(HACKERRANK_SVG_SERVICE, username, fetch)
+            svg = get_blob_store().get(digest) if digest is not None else None
+        return svg.decode('utf-8') if svg is not None else None
+
+    return get_single_flight().do((HACKERRANK_SVG_SERVICE, username, force_refresh), lookup)
+
+
+def fetch_hackerrank_badges_svg(username, force_refresh=False):
+    """
+    Fetch HackerRank badges by parsing SVG structure directly
+    An SVG that was parsed before is not parsed again.
+    Returns list of dictionaries with badge names and star counts
+    """
+    try:
+        svg_xml = fetch_hackerrank_svg(username, force_refresh)
+        if svg_xml is None:
+            return None
+        return badges_from_svg(svg_xml)
+
+    except Exception as e:
+        logger.warning("Exception occurred for %s: %s", username, e)
+        return None
+
+
+def badges_from_svg(svg_xml):
+    """Parse a badge SVG, reusing the result for an SVG that was parsed before"""
+    memo = get_badge_memo()
+    found, badges = memo.get(svg_xml)
+    if not found:
+        start = time.perf_counter()
+        badges = parse_badges_svg(svg_xml)
+        get_metrics().observe_parse(time.perf_counter() - start)
+        memo.put(svg_xml, badges)
+    return badges
+
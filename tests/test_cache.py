@@ -0,0 +1,112 @@
+import pytest
+
+import cache
+from cache import NOT_MODIFIED, Fetched, ResponseCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+class Upstream:
+    """fetch function for get_or_fetch that records the validators it was sent"""
+
+    def __init__(self, *results):
+        self.results = list(results)
+        self.validators = []
+
+    def __call__(self, validators):
+        self.validators.append(validators)
+        return self.results.pop(0)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache.time, 'time', clock)
+    return clock
+
+
+@pytest.fixture
+def responses(tmp_path, clock):
+    return ResponseCache(path=str(tmp_path / 'cache.sqlite3'), ttl=100, negative_ttl=10, max_entries=3)
+
+
+def test_fresh_entries_are_served_without_fetching(responses, clock):
+    upstream = Upstream(Fetched({'totalSolved': 5}, etag='"v1"'))
+    assert responses.get_or_fetch('stats', 'alice', upstream) == {'totalSolved': 5}
+    clock.now += 100
+    assert responses.get_or_fetch('stats', 'alice', upstream) == {'totalSolved': 5}
+    assert upstream.validators == [{}]
+
+
+def test_expired_entries_are_revalidated(responses, clock):
+    upstream = Upstream(
+        Fetched({'totalSolved': 5}, etag='"v1"', last_modified='Mon, 03 Mar 2025 10:00:00 GMT'),
+        NOT_MODIFIED,
+        Fetched({'totalSolved': 6}, etag='"v2"'),
+    )
+    responses.get_or_fetch('stats', 'alice', upstream)
+    clock.now += 101
+    # A 304 keeps the stored value and makes it fresh again
+    assert responses.get_or_fetch('stats', 'alice', upstream) == {'totalSolved': 5}
+    clock.now += 50
+    assert responses.lookup('stats', 'alice') == (True, {'totalSolved': 5})
+    clock.now += 51
+    assert responses.get_or_fetch('stats', 'alice', upstream) == {'totalSolved': 6}
+    assert upstream.validators == [
+        {},
+        {'etag': '"v1"', 'last_modified': 'Mon, 03 Mar 2025 10:00:00 GMT'},
+        {'etag': '"v1"', 'last_modified': 'Mon, 03 Mar 2025 10:00:00 GMT'},
+    ]
+
+
+def test_negative_entries_use_the_shorter_ttl_and_no_validators(responses, clock):
+    upstream = Upstream(Fetched(None, negative=True, etag='"gone"'), {'totalSolved': 1})
+    assert responses.get_or_fetch('stats', 'ghost', upstream) is None
+    clock.now += 10
+    assert responses.lookup('stats', 'ghost') == (True, None)
+    assert responses.get_or_fetch('stats', 'ghost', upstream) is None
+    clock.now += 1
+    assert responses.get_or_fetch('stats', 'ghost', upstream) == {'totalSolved': 1}
+    assert upstream.validators == [{}, {}]
+
+
+def test_transient_failures_are_not_stored(responses):
+    upstream = Upstream(None, {'totalSolved': 2})
+    assert responses.get_or_fetch('stats', 'alice', upstream) is None
+    assert responses.lookup('stats', 'alice') == (False, None)
+    assert responses.get_or_fetch('stats', 'alice', upstream) == {'totalSolved': 2}
+
+
+def test_force_refresh_fetches_fresh_entries_again(responses):
+    upstream = Upstream(Fetched(1, etag='"v1"'), 2)
+    responses.get_or_fetch('stats', 'alice', upstream)
+    assert responses.get_or_fetch('stats', 'alice', upstream, force_refresh=True) == 2
+    assert upstream.validators == [{}, {'etag': '"v1"'}]
+
+
+def test_eviction_drops_unrevalidatable_expired_then_least_recently_used(responses, clock, monkeypatch):
+    monkeypatch.setattr(cache, 'EVICT_INTERVAL', 1)
+    responses.set('stats', 'plain', 1)
+    responses.set('stats', 'tagged', 2, etag='"t"')
+    responses.set('stats', 'missing', None, negative=True)
+    clock.now += 101
+    responses.set('stats', 'a', 3)
+    # Expired entries without validators are gone; the tagged one waits for revalidation
+    assert responses.lookup('stats', 'plain') == (False, None)
+    assert responses.get_or_fetch('stats', 'tagged', Upstream(NOT_MODIFIED)) == 2
+
+    clock.now += 1
+    responses.set('stats', 'b', 4)
+    clock.now += 1
+    responses.lookup('stats', 'a')
+    clock.now += 1
+    responses.set('stats', 'c', 5)
+    # Four entries for three places: 'tagged' was used least recently
+    assert responses.lookup('stats', 'tagged') == (False, None)
+    assert [responses.get('stats', key) for key in ('a', 'b', 'c')] == [3, 4, 5]
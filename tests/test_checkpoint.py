@@ -0,0 +1,97 @@
+import pandas as pd
+import pytest
+
+from checkpoint import RunJournal
+from enrichment import HACKERRANK_SERVICE, LEETCODE_SERVICE, enrich_students
+from schema import HACKERRANK_USERNAME, LEETCODE_USERNAME, normalize_students, roll_key
+from scraper import HACKERRANK_BADGES_HOST, LEETCODE_STATS_HOST
+
+
+class StubLookups:
+    """Result builders that answer from each username and count their calls"""
+
+    def __init__(self):
+        self.calls = []
+
+    def leetcode(self, username, force_refresh=False):
+        self.calls.append((LEETCODE_SERVICE, username))
+        if not username:
+            return {'LeetCode_Status': 'No URL'}
+        return {'LeetCode_Total_Solved': int(username.removeprefix('lc')), 'LeetCode_Status': 'Success'}
+
+    def hackerrank(self, username, force_refresh=False):
+        self.calls.append((HACKERRANK_SERVICE, username))
+        if not username:
+            return {'HackerRank_Status': 'No URL'}
+        return {'HackerRank_Total_Badges': int(username.removeprefix('hr')), 'HackerRank_Status': 'Success'}
+
+    def services(self):
+        return (
+            (LEETCODE_SERVICE, LEETCODE_STATS_HOST, LEETCODE_USERNAME, self.leetcode),
+            (HACKERRANK_SERVICE, HACKERRANK_BADGES_HOST, HACKERRANK_USERNAME, self.hackerrank),
+        )
+
+
+def enrich(df, stubs, journal, **kwargs):
+    return enrich_students(df, journal=journal, upload_hash='upload', services=stubs.services(),
+                           batched_services={}, parsed_services={}, **kwargs)
+
+
+@pytest.fixture
+def journal(tmp_path):
+    return RunJournal(path=str(tmp_path / 'journal.sqlite3'))
+
+
+@pytest.fixture
+def students():
+    return normalize_students(pd.DataFrame({
+        'Roll Number': ['21A1', None, ' ', '21a2'],
+        'LeetCode profile': ['lc1', 'lc2', 'lc3', 'lc4'],
+        'Hackerrank profile': ['hr1', 'hr2', 'hr3', 'hr4'],
+    }))
+
+
+def test_roll_key_is_none_for_missing_roll_numbers():
+    assert roll_key(' 21a1 ') == '21A1'
+    assert roll_key(None) is None
+    assert roll_key(pd.NA) is None
+    assert roll_key('  ') is None
+
+
+def test_resume_reuses_journaled_rows_only(students, journal):
+    first = StubLookups()
+    enrich(students, first, journal)
+    assert len(first.calls) == 8
+
+    resumed = StubLookups()
+    df = enrich(students, resumed, journal)
+    # Only the two rows without a roll number are fetched again
+    assert sorted(resumed.calls) == [
+        (HACKERRANK_SERVICE, 'hr2'), (HACKERRANK_SERVICE, 'hr3'),
+        (LEETCODE_SERVICE, 'lc2'), (LEETCODE_SERVICE, 'lc3'),
+    ]
+    assert df['LeetCode_Total_Solved'].tolist() == [1, 2, 3, 4]
+    assert df['HackerRank_Total_Badges'].tolist() == [1, 2, 3, 4]
+    assert set(journal.completed('upload')) == {
+        (roll, service) for roll in ('21A1', '21A2') for service in (LEETCODE_SERVICE, HACKERRANK_SERVICE)
+    }
+
+
+def test_roll_less_rows_keep_their_own_values_on_resume(journal):
+    df = normalize_students(pd.DataFrame({
+        'Roll Number': [None, None],
+        'LeetCode profile': ['lc7', 'lc9'],
+        'Hackerrank profile': ['hr7', 'hr9'],
+    }))
+    enrich(df, StubLookups(), journal)
+    resumed = enrich(df, StubLookups(), journal)
+    assert resumed['LeetCode_Total_Solved'].tolist() == [7, 9]
+    assert resumed['HackerRank_Total_Badges'].tolist() == [7, 9]
+    assert journal.completed('upload') == {}
+
+
+def test_force_refresh_ignores_the_journal(students, journal):
+    enrich(students, StubLookups(), journal)
+    refreshed = StubLookups()
+    enrich(students, refreshed, journal, force_refresh=True)
+    assert len(refreshed.calls) == 8
@@ -0,0 +1,96 @@
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+from enrichment import HACKERRANK_SERVICE, LEETCODE_SERVICE, STATUS_DTYPE, enrich_students
+from schema import HACKERRANK_USERNAME, LEETCODE_USERNAME, normalize_students
+from scraper import HACKERRANK_BADGES_HOST, LEETCODE_GRAPHQL_HOST, LEETCODE_STATS_HOST
+
+
+class Recorder:
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def record(self, call):
+        with self._lock:
+            self.calls.append(call)
+        time.sleep(self.delay)
+
+    def leetcode(self, username, force_refresh=False):
+        self.record(('stats', username))
+        if not username:
+            return {'LeetCode_Status': 'No URL' if username is None else 'Invalid URL'}
+        return {'LeetCode_Total_Solved': len(username), 'LeetCode_Status': 'Success'}
+
+    def leetcode_batch(self, usernames, force_refresh=False):
+        self.record(('batch', tuple(usernames)))
+        # Users whose name starts with 'x' are left for the stats API
+        return {username: {'LeetCode_Total_Solved': 100, 'LeetCode_Status': 'Success'}
+                for username in usernames if not username.startswith('x')}
+
+    def hackerrank(self, username, force_refresh=False):
+        self.record(('badges', username))
+        if not username:
+            return {'HackerRank_Status': 'No URL'}
+        return {'HackerRank_Total_Badges': 1, 'HackerRank_Status': 'Success'}
+
+    def tables(self, batch_size=0):
+        services = (
+            (LEETCODE_SERVICE, LEETCODE_STATS_HOST, LEETCODE_USERNAME, self.leetcode),
+            (HACKERRANK_SERVICE, HACKERRANK_BADGES_HOST, HACKERRANK_USERNAME, self.hackerrank),
+        )
+        batched = {LEETCODE_SERVICE: (LEETCODE_GRAPHQL_HOST, self.leetcode_batch, batch_size)}
+        return {'services': services, 'batched_services': batched, 'parsed_services': {}}
+
+
+def cohort(leetcode, hackerrank):
+    return normalize_students(pd.DataFrame({
+        'Roll Number': [f'R{i}' for i in range(len(leetcode))],
+        'LeetCode profile': leetcode,
+        'Hackerrank profile': hackerrank,
+    }))
+
+
+def test_shared_usernames_are_looked_up_once():
+    df = cohort(['amy', 'amy', None, 'https://leetcode.com/contest/'], ['hr', 'hr', 'hr', None])
+    stubs = Recorder()
+    progress = []
+    rows = {}
+    result = enrich_students(df, progress_callback=lambda done, total, roll: progress.append((done, total)),
+                             row_callback=rows.__setitem__, **stubs.tables())
+    assert sorted(stubs.calls, key=repr) == sorted(
+        [('stats', 'amy'), ('stats', None), ('stats', ''), ('badges', 'hr'), ('badges', None)], key=repr)
+    assert result['LeetCode_Status'].tolist() == ['Success', 'Success', 'No URL', 'Invalid URL']
+    assert result['LeetCode_Status'].dtype == STATUS_DTYPE
+    assert result['HackerRank_Total_Badges'].tolist() == [1, 1, 1, pd.NA]
+    assert [done for done, _ in progress] == [1, 2, 3, 4]
+    assert sorted(rows) == [0, 1, 2, 3]
+
+
+def test_batches_fall_back_to_the_stats_api():
+    df = cohort(['a1', 'a2', 'xa3', 'a4', 'a5'], [None] * 5)
+    stubs = Recorder()
+    result = enrich_students(df, **stubs.tables(batch_size=2))
+    batches = [call[1] for call in stubs.calls if call[0] == 'batch']
+    assert sorted(batches) == [('a1', 'a2'), ('a5',), ('xa3', 'a4')]
+    assert ('stats', 'xa3') in stubs.calls
+    assert result['LeetCode_Total_Solved'].tolist() == [100, 100, 3, 100, 100]
+
+
+def test_failed_run_does_not_wait_for_queued_lookups():
+    df = cohort([f'lc{i}' for i in range(100)], [f'hr{i}' for i in range(100)])
+    stubs = Recorder(delay=0.1)
+
+    def fail(position, values):
+        raise OSError('disk full')
+
+    start = time.perf_counter()
+    with pytest.raises(OSError):
+        enrich_students(df, row_callback=fail, host_limits={LEETCODE_STATS_HOST: 2, HACKERRANK_BADGES_HOST: 2},
+                        **stubs.tables())
+    # Finishing every queued lookup would take 100 x 0.1 s / 2 per host
+    assert time.perf_counter() - start < 1.5
@@ -0,0 +1,52 @@
+from datetime import datetime, timezone
+
+import pandas as pd
+import pytest
+
+from enrichment import with_enrichment_columns
+from history import SnapshotStore, TAKEN_AT
+from schema import ROLL_NUMBER, normalize_students
+
+DAY = 24 * 60 * 60
+START = datetime(2025, 3, 1, tzinfo=timezone.utc).timestamp()
+
+
+def enriched(rolls, solved):
+    df = normalize_students(pd.DataFrame({'Roll Number': rolls, 'Section': ['A'] * len(rolls)}))
+    return with_enrichment_columns(df, [
+        {'LeetCode_Total_Solved': count, 'LeetCode_Status': 'Success' if count is not None else 'Failed'}
+        for count in solved
+    ])
+
+
+@pytest.fixture
+def store(tmp_path):
+    return SnapshotStore(root=str(tmp_path / 'history'), compact_threshold=3)
+
+
+def test_students_without_roll_numbers_are_not_recorded(store):
+    store.append(enriched(['21a1', None, ' ', '21A2'], [10, 20, 30, 40]), 'run-1', taken_at=START)
+    snapshots = store.read()
+    assert snapshots[ROLL_NUMBER].tolist() == ['21A1', '21A2']
+    assert snapshots['LeetCode_Total_Solved'].tolist() == [10, 40]
+    assert store.student_history(None).empty
+    assert store.deltas(START, roll_numbers=['21A1', None]).index.tolist() == ['21A1']
+
+
+def test_student_history_and_deltas_across_compaction(store):
+    store.append(enriched(['21A1', '21A2'], [10, 5]), 'run-1', taken_at=START)
+    store.append(enriched(['21A1', '21A2'], [12, None]), 'run-2', taken_at=START + 60)
+    store.append(enriched(['21A1', '21A2'], [15, 9]), 'run-3', taken_at=START + DAY)
+    # The first day's two files plus one more on that day reach the threshold
+    store.append(enriched(['21A1'], [11]), 'run-4', taken_at=START + 120)
+
+    history = store.student_history(' 21a1')
+    assert history['Run ID'].tolist() == ['run-1', 'run-2', 'run-4', 'run-3']
+    assert history[TAKEN_AT].is_monotonic_increasing
+
+    deltas = store.deltas(datetime.fromtimestamp(START + 150, timezone.utc))
+    assert deltas.loc['21A1', 'LeetCode_Total_Solved_Before'] == 11
+    assert deltas.loc['21A1', 'LeetCode_Total_Solved_Change'] == 4
+    # A failed lookup falls back to the run before it
+    assert deltas.loc['21A2', 'LeetCode_Total_Solved_Before'] == 5
+    assert deltas.loc['21A2', 'LeetCode_Total_Solved_Change'] == 4
@@ -0,0 +1,99 @@
+import os
+import threading
+
+import pandas as pd
+import pytest
+
+import jobs
+from enrichment import with_enrichment_columns
+from history import SnapshotStore
+from jobs import DONE, FAILED, JobRunner
+from schema import normalize_students
+
+
+@pytest.fixture
+def students():
+    return normalize_students(pd.DataFrame({
+        'Roll Number': ['21A1', '21A2'],
+        'LeetCode profile': ['one', 'two'],
+        'CGPA': ['7.95', '8.1'],
+    }))
+
+
+@pytest.fixture
+def runner(tmp_path, monkeypatch):
+    monkeypatch.setattr(jobs, 'get_history', lambda: SnapshotStore(root=str(tmp_path / 'history')))
+    runner = JobRunner(result_dir=str(tmp_path / 'results'), max_workers=1)
+    yield runner
+    runner._executor.shutdown()
+
+
+def stub_enrichment(release=None):
+    def enrich(df, row_callback=None, **kwargs):
+        if release is not None:
+            release.wait(5)
+        results = [{'LeetCode_Total_Solved': 10 * (position + 1), 'LeetCode_Status': 'Success'}
+                   for position in range(len(df))]
+        for position, values in enumerate(results):
+            row_callback(position, values)
+        return with_enrichment_columns(df, results)
+    return enrich
+
+
+def wait(runner, job):
+    # The metadata file is written last
+    for _ in range(500):
+        if job.finished and os.path.exists(runner._path(job.id, 'json')):
+            return job
+        threading.Event().wait(0.01)
+    raise AssertionError(f"job {job.id} did not finish")
+
+
+def test_finished_job_keeps_no_frame_and_reads_its_export(runner, students, monkeypatch):
+    monkeypatch.setattr(jobs, 'enrich_students', stub_enrichment())
+    job, created = runner.submit(students, 'upload')
+    assert created
+    wait(runner, job)
+    assert job.status == DONE
+    assert not hasattr(job, 'result')
+    result = job.result_frame()
+    assert result['LeetCode_Total_Solved'].tolist() == [10, 20]
+    assert str(result['LeetCode_Total_Solved'].dtype) == 'Int16'
+    assert result['CGPA'].tolist() == [7.95, 8.1]
+
+
+def test_submissions_attach_while_running_and_finished_jobs_are_pruned(runner, students, monkeypatch):
+    release = threading.Event()
+    monkeypatch.setattr(jobs, 'enrich_students', stub_enrichment(release))
+    job, _ = runner.submit(students, 'upload')
+    attached, created = runner.submit(students, 'upload')
+    assert attached is job and not created
+    release.set()
+    wait(runner, job)
+
+    other, created = runner.submit(students, 'other upload')
+    assert created
+    assert list(runner._active.values()) == [other]
+    # Still reachable by ID, e.g. from a job link in the URL
+    assert runner.get(job.id) is job
+    wait(runner, other)
+
+
+def test_jobs_are_restored_from_the_result_store(runner, students, monkeypatch):
+    monkeypatch.setattr(jobs, 'enrich_students', stub_enrichment())
+    job = wait(runner, runner.submit(students, 'upload')[0])
+    restored = JobRunner(result_dir=runner.result_dir).get(job.id)
+    assert restored is not job
+    assert restored.status == DONE and restored.total == 2
+    assert restored.result_frame()['LeetCode_Total_Solved'].tolist() == [10, 20]
+    assert runner.get('../../etc/passwd') is None
+
+
+def test_failed_job_reports_the_error(runner, students, monkeypatch):
+    def fail(df, **kwargs):
+        raise OSError('disk full')
+    monkeypatch.setattr(jobs, 'enrich_students', fail)
+    job = wait(runner, runner.submit(students, 'upload')[0])
+    assert job.status == FAILED
+    assert job.error == 'disk full'
+    assert job.result_frame() is None
@@ -0,0 +1,123 @@
+import threading
+
+import pytest
+
+import limiter
+from limiter import MIN_LATENCY_SAMPLES, RETRY_AFTER_MAX_SECONDS, TIMEOUT_FLOOR_SECONDS, AdaptiveLimiter
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(limiter.time, 'monotonic', clock)
+    return clock
+
+
+def fill(lim):
+    for _ in range(int(lim.limit)):
+        lim.acquire()
+
+
+def test_limit_grows_only_when_fully_used(clock):
+    lim = AdaptiveLimiter(initial=4)
+    lim.acquire()
+    lim.release(0.1)
+    assert lim.limit == 4
+
+    fill(lim)
+    lim.release(0.1)
+    assert lim.limit == pytest.approx(4.25)
+
+
+def test_limit_stays_within_bounds(clock):
+    lim = AdaptiveLimiter(initial=2, minimum=1, maximum=3)
+    for _ in range(20):
+        fill(lim)
+        for _ in range(int(lim.limit)):
+            lim.release(0.1)
+    assert lim.limit == 3
+
+    for _ in range(5):
+        clock.now += 1
+        lim.acquire()
+        lim.release(1.0, overloaded=True)
+    assert lim.limit == 1
+
+
+def test_overload_halves_once_per_round_trip(clock):
+    lim = AdaptiveLimiter(initial=8)
+    lim.acquire()
+    lim.release(0.2)
+    fill(lim)
+    # One burst of failures within a round trip counts once
+    lim.release(0.2, overloaded=True)
+    lim.release(0.2, overloaded=True)
+    assert lim.limit == 4
+    clock.now += 0.5
+    lim.release(0.2, overloaded=True)
+    assert lim.limit == 2
+
+
+def test_latency_spike_cuts_the_limit(clock):
+    lim = AdaptiveLimiter(initial=10)
+    for _ in range(MIN_LATENCY_SAMPLES * 4):
+        lim.acquire()
+        lim.release(0.05)
+    assert lim.limit == 10
+    for _ in range(8):
+        clock.now += 1
+        lim.acquire()
+        lim.release(1.0)
+    assert lim.limit < 10
+
+
+def test_retry_after_pauses_the_host(clock):
+    lim = AdaptiveLimiter()
+    lim.acquire()
+    lim.release(0.1, overloaded=True, retry_after=3600)
+    assert lim.state()['paused_seconds'] == RETRY_AFTER_MAX_SECONDS
+
+    acquired = threading.Event()
+    waiter = threading.Thread(target=lambda: (lim.acquire(), acquired.set()))
+    waiter.start()
+    assert not acquired.wait(0.1)
+    clock.now += RETRY_AFTER_MAX_SECONDS
+    with lim._cond:
+        lim._cond.notify_all()
+    assert acquired.wait(2)
+    waiter.join()
+
+
+def test_acquire_blocks_at_the_limit(clock):
+    lim = AdaptiveLimiter(initial=1)
+    lim.acquire()
+    acquired = threading.Event()
+    waiter = threading.Thread(target=lambda: (lim.acquire(), acquired.set()))
+    waiter.start()
+    assert not acquired.wait(0.1)
+    lim.release(0.1)
+    assert acquired.wait(2)
+    waiter.join()
+
+
+def test_timeout_follows_latency_and_backs_off(clock):
+    lim = AdaptiveLimiter()
+    assert lim.timeout(10) == 10
+    for _ in range(MIN_LATENCY_SAMPLES):
+        lim.acquire()
+        lim.release(0.1)
+    assert lim.timeout(10) == TIMEOUT_FLOOR_SECONDS
+    assert lim.timeout(1) == 1
+    assert lim.timeout((3, 10)) == (3, 10)
+    for _ in range(2):
+        lim.acquire()
+        lim.release(0.1, overloaded=True, timed_out=True)
+    assert lim.timeout(30) == 4 * TIMEOUT_FLOOR_SECONDS
@@ -0,0 +1,136 @@
+import io
+
+import pandas as pd
+import pytest
+from openpyxl import Workbook
+
+from schema import (
+    CODECHEF_USERNAME,
+    COMPLETION_TIME,
+    HACKERRANK_USERNAME,
+    LEETCODE_USERNAME,
+    LINK_PROBLEMS,
+    NAME,
+    ROLL_NUMBER,
+    StudentTable,
+    normalize_students,
+    read_students,
+)
+
+
+def csv_file(text, name='students.csv'):
+    source = io.BytesIO(text.encode('utf-8'))
+    source.name = name
+    return source
+
+
+def xlsx_file(rows, name='students.xlsx'):
+    workbook = Workbook()
+    for row in rows:
+        workbook.active.append(row)
+    source = io.BytesIO()
+    workbook.save(source)
+    source.seek(0)
+    source.name = name
+    return source
+
+
+def test_latest_submission_wins_across_files():
+    first = csv_file(
+        "Roll No,Leetcode URL,Completion time\n"
+        "21a1,https://leetcode.com/u/old/,01/03/2025 10:00\n"
+        "21A2,two,01/03/2025 10:00\n"
+    )
+    second = xlsx_file([
+        ('Roll Number', 'LeetCode profile', 'Timestamp'),
+        (' 21A1 ', 'https://leetcode.com/new/', pd.Timestamp('2025-03-02 09:00').to_pydatetime()),
+        ('21A3', 'three', None),
+    ])
+    df = read_students(first, second)
+    assert df[ROLL_NUMBER].str.strip().str.upper().tolist() == ['21A2', '21A1', '21A3']
+    assert df.set_index(df[ROLL_NUMBER].str.strip().str.upper())[LEETCODE_USERNAME].to_dict() == {
+        '21A1': 'new', '21A2': 'two', '21A3': 'three',
+    }
+
+
+def test_last_row_wins_without_completion_times():
+    df = read_students(
+        csv_file("Roll Number,LeetCode profile\n21A1,first\n"),
+        csv_file("Roll Number,LeetCode profile\n21a1,second\n"),
+    )
+    assert COMPLETION_TIME not in df.columns
+    assert df[LEETCODE_USERNAME].tolist() == ['second']
+
+
+def test_rows_without_roll_numbers_are_kept_and_reported():
+    df = read_students(
+        csv_file("Roll Number,Name,LeetCode profile\n,Asha,a\n  ,Ravi,r\n21A1,Mia,m\n"),
+        csv_file("Roll Number,Name,LeetCode profile\n ,Zoe,z\n"),
+    )
+    assert df[NAME].tolist() == ['Asha', 'Ravi', 'Mia', 'Zoe']
+    students = StudentTable(df)
+    assert students.missing_roll_numbers[NAME].tolist() == ['Asha', 'Ravi', 'Zoe']
+    assert students.lookup(' 21a1')[NAME] == 'Mia'
+    assert students.lookup('') is None
+
+
+def parse_links(column, links):
+    df = normalize_students(pd.DataFrame({'Roll Number': [str(i) for i in range(len(links))], column: links}))
+    return df
+
+
+@pytest.mark.parametrize('link, username', [
+    ('https://leetcode.com/u/alice/', 'alice'),
+    ('leetcode.com/alice', 'alice'),
+    ('https://www.leetcode.com/profile/alice?tab=solutions', 'alice'),
+    ('https://leetcode.com/alice/#recent', 'alice'),
+    # Handles that happen to be site page names are fine after /u/ or /profile/
+    ('https://leetcode.com/u/contest/', 'contest'),
+    ('leetcode.com/u/explore', 'explore'),
+    ('https://leetcode.com/profile/u/', 'u'),
+    ('@alice', 'alice'),
+    ('  alice.b-1 ', 'alice.b-1'),
+    ('https://leetcode.com/contest/', ''),
+    ('https://leetcode.com/problems/two-sum/?envType=daily', ''),
+    ('https://leetcode.com/u/', ''),
+    ('https://leetcode.com/u', ''),
+    ('https://github.com/alice', ''),
+    ('NA', None),
+    ('-', None),
+    (None, None),
+])
+def test_leetcode_links(link, username):
+    df = parse_links('LeetCode profile', [link])
+    assert df[LEETCODE_USERNAME].iloc[0] == username
+    assert pd.notna(df[LINK_PROBLEMS].iloc[0]) == (username == '')
+
+
+@pytest.mark.parametrize('link, username', [
+    ('https://www.hackerrank.com/profile/alice', 'alice'),
+    ('https://www.hackerrank.com/profile/alice/badges?hr_r=1', 'alice'),
+    ('hackerrank.com/alice', 'alice'),
+    ('https://www.hackerrank.com/profile/dashboard', 'dashboard'),
+    ('https://www.hackerrank.com/dashboard', ''),
+    ('https://www.hackerrank.com/challenges/solve-me-first/problem', ''),
+    ('https://www.hackerrank.com/profile/', ''),
+])
+def test_hackerrank_links(link, username):
+    assert parse_links('Hackerrank profile', [link])[HACKERRANK_USERNAME].iloc[0] == username
+
+
+def test_link_problems_say_why():
+    df = parse_links('LeetCode profile', ['https://leetcode.com/contest/', 'https://github.com/alice', 'two words'])
+    assert df[LINK_PROBLEMS].tolist() == [
+        'LeetCode: link has no username',
+        'LeetCode: not a leetcode.com link',
+        'LeetCode: not a username',
+    ]
+
+
+def test_shared_codechef_column_reads_only_codechef_links():
+    df = parse_links('Any other coding platforms (if applicable)', [
+        'https://www.codechef.com/users/alice?tab=stats', 'https://codeforces.com/profile/bob', 'bob', 'no',
+        'https://www.codechef.com/practice',
+    ])
+    assert df[CODECHEF_USERNAME].tolist() == ['alice', None, None, None, '']
+    assert df[LINK_PROBLEMS].isna().tolist() == [True, True, True, True, False]